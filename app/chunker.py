@@ -1,50 +1,149 @@
 import re
-from typing import Iterable
+from typing import Iterable, Iterator
 
+import numpy as np
 
-def chunk(text: str, chunk_size: int = 240, overlap: int = 40) -> Iterable[str]:
-    if not text:
-        return []
+try:
+    from numba import njit
 
-    sentences = _split_sentences(text)
-    if not sentences:
-        return []
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import re2
+
+    # RE2's \s is ASCII-only; spell out the full set Python's \s matches so
+    # both backends collapse exactly the same characters.
+    _WS_RE = re2.compile(r"[\t-\r\x1c-\x1f\x85\p{Z}]+")
+except ImportError:
+    _WS_RE = re.compile(r"\s+")
+
+
+def chunk(
+    text: str | Iterable[str], chunk_size: int = 240, overlap: int = 40
+) -> Iterator[str]:
+    """
+    Split text into sentence-aligned chunks of roughly ``chunk_size`` words.
+
+    ``text`` may be a single string or an iterable of pieces (e.g. PDF pages)
+    treated as if joined with newlines. Pieces are consumed lazily and each
+    chunk is yielded as soon as it is complete, so only the sentences of the
+    chunk still being built are kept between pieces.
+    """
+    if isinstance(text, str):
+        text = (text,)
+
+    sentences: list[str] = []
+    sentence_lens: list[int] = []
+    min_end = 1
+    for new_sentences in _iter_sentences(text):
+        sentences.extend(new_sentences)
+        # Sentences are single-space separated after split_sentences, so the
+        # word count is the space count plus one (no list allocation).
+        sentence_lens.extend(sentence.count(" ") + 1 for sentence in new_sentences)
 
-    chunks: list[str] = []
-    current: list[str] = []
-    current_len = 0
-    sentence_lens = [len(sentence.split()) for sentence in sentences]
+        bounds = _pack_indices(sentence_lens, chunk_size, overlap, min_end)
+        # Every chunk but the last was closed by a sentence that didn't fit,
+        # so it is final; the last one may still grow with the next piece.
+        for start, end in bounds[:-1]:
+            yield " ".join(sentences[start:end]).strip()
 
-    for sentence, length in zip(sentences, sentence_lens):
-        if current_len + length > chunk_size and current:
-            chunks.append(" ".join(current).strip())
-            current, current_len = _overlap_tail(current, overlap)
+        start = bounds[-1][0]
+        min_end = (bounds[-2][1] + 1 if len(bounds) > 1 else min_end) - start
+        del sentences[:start], sentence_lens[:start]
 
-        current.append(sentence)
-        current_len += length
+    if sentences:
+        for start, end in _pack_indices(sentence_lens, chunk_size, overlap, min_end):
+            yield " ".join(sentences[start:end]).strip()
 
-    if current:
-        chunks.append(" ".join(current).strip())
 
-    return [c for c in chunks if c]
+def _iter_sentences(pieces: Iterable[str]) -> Iterator[list[str]]:
+    """
+    Yield the complete sentences of a text stream, one list per piece.
 
+    The last sentence of a piece may continue into the next one, so it is
+    held back until the following piece (or the end of the stream) settles it.
+    """
+    pending: list[str] = []
+    for piece in pieces:
+        sentences = split_sentences(piece)
+        if not sentences:
+            continue
+        if pending and pending[-1][-1] not in ".!?":
+            pending.append(sentences[0])
+            sentences = sentences[1:]
+            if not sentences:
+                continue
+        complete = [" ".join(pending)] if pending else []
+        complete.extend(sentences[:-1])
+        pending = [sentences[-1]]
+        if complete:
+            yield complete
+    if pending:
+        yield [" ".join(pending)]
 
-def _split_sentences(text: str) -> list[str]:
-    cleaned = re.sub(r"\s+", " ", text).strip()
+
+def split_sentences(text: str) -> list[str]:
+    cleaned = _WS_RE.sub(" ", text).strip()
     if not cleaned:
         return []
-    return [s for s in re.split(r"(?<=[.!?])\s+", cleaned) if s]
+    # Whitespace is collapsed to single spaces above, so "\n" can't occur in
+    # `cleaned` and is safe as a boundary marker. Three C-level replaces plus
+    # one split beat evaluating a lookbehind at every space.
+    marked = cleaned.replace(". ", ".\n").replace("! ", "!\n").replace("? ", "?\n")
+    return [s for s in marked.split("\n") if s]
+
+
+def _pack_indices(
+    lens: list[int], chunk_size: int, overlap: int, min_end: int = 1
+) -> list[tuple[int, int]]:
+    """
+    Greedily pack sentences into chunks of at most ``chunk_size`` words.
+
+    Each chunk is returned as a ``(start, end)`` slice into the sentence list.
+    A chunk always holds at least one new sentence; the next chunk starts with
+    the trailing sentences of the previous one that fit in ``overlap`` words
+    (at least one sentence when overlap is enabled). ``min_end`` lets a
+    caller resume packing a chunk that started as an overlap tail.
 
+    Boundaries are found with ``searchsorted`` over a prefix sum of sentence
+    lengths instead of walking sentences one at a time in Python.
+    """
+    n = len(lens)
+    cum = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lens, out=cum[1:])
+    bounds = _pack_bounds(cum, chunk_size, overlap, min_end)
+    return [(start, end) for start, end in bounds.tolist()]
 
-def _overlap_tail(sentences: list[str], overlap_words: int) -> tuple[list[str], int]:
-    if overlap_words <= 0:
-        return [], 0
-    tail: list[str] = []
+
+def _pack_bounds(
+    cum: np.ndarray, chunk_size: int, overlap: int, min_end: int
+) -> np.ndarray:
+    """Packing loop behind _pack_indices; returns an ``(n_chunks, 2)`` array."""
+    n = cum.shape[0] - 1
+    # Every chunk ends past the previous one, so there are at most n chunks.
+    bounds = np.empty((max(n, 1), 2), dtype=np.int64)
     count = 0
-    for sentence in reversed(sentences):
-        length = len(sentence.split())
-        if count + length > overlap_words and tail:
+    start = 0
+    while True:
+        end = np.searchsorted(cum, cum[start] + chunk_size, side="right") - 1
+        end = min(max(end, min_end), n)
+        bounds[count, 0] = start
+        bounds[count, 1] = end
+        count += 1
+        if end >= n:
             break
-        tail.insert(0, sentence)
-        count += length
-    return tail, count
+        if overlap > 0:
+            tail = np.searchsorted(cum, cum[end] - overlap, side="left")
+            start = min(max(tail, start), end - 1)
+        else:
+            start = end
+        min_end = end + 1
+    return bounds[:count]
+
+
+if NUMBA_AVAILABLE:
+    # Compiled once and cached on disk; the loop then runs without
+    # per-iteration interpreter or NumPy scalar overhead.
+    _pack_bounds = njit(cache=True)(_pack_bounds)
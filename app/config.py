@@ -10,6 +10,9 @@ DOCS_PATH = DOCS_DIR
 INDEX_PATH = DATA_DIR / "index"
 RESEARCH_PATH = DATA_DIR / "research"
 
+# Vision API descriptions, keyed by image content hash
+IMAGE_CACHE_DIR = DATA_DIR / "image_cache"
+
 # Scanner configuration
 SCANNER_CONFIG_PATH = ROOT_DIR / "scanner_config.yaml"
 SCAN_MANIFEST_PATH = DATA_DIR / "scan_manifest.json"
@@ -16,28 +16,72 @@ logger = logging.getLogger("rag")
 
 # Singleton model cache
 _model_cache: dict[str, SentenceTransformer] = {}
+_shared_models: set[str] = set()
 _cache_lock = threading.Lock()
 
 DEFAULT_MODEL = "multi-qa-MiniLM-L6-cos-v1"
 
+# Texts per forward pass in encode()
+EMBED_BATCH_SIZE = 64
 
-def get_cached_model(model_name: str = DEFAULT_MODEL) -> SentenceTransformer:
+PRECISIONS = ("float32", "float16")
+
+# Embeddings are L2-normalized, so every component lies in [-1, 1] and one
+# shared scale maps them onto the full int8 range.
+INT8_SCALE = 1.0 / 127.0
+
+
+def dequantize_int8(codes: np.ndarray) -> np.ndarray:
+    """Convert int8 codes from EmbeddingGenerator.embed_int8 back to float32."""
+    return codes.astype(np.float32) * np.float32(INT8_SCALE)
+
+
+def get_cached_model(model_name: str = DEFAULT_MODEL, half: bool = False) -> SentenceTransformer:
     """
     Get or load a cached SentenceTransformer model.
     
     Thread-safe singleton pattern ensures the model is loaded only once
     across all EmbeddingGenerator instances.
+    
+    SentenceTransformer already picks CUDA/MPS when available. With
+    half=True the weights are converted to FP16 on those accelerators (CPU
+    kernels keep FP32); half and full precision models are cached separately
+    so callers never see each other's weights change.
     """
+    cache_key = f"{model_name}:fp16" if half else model_name
     with _cache_lock:
-        if model_name not in _model_cache:
+        if cache_key not in _model_cache:
             logger.info("Loading embedding model: %s", model_name)
             try:
-                _model_cache[model_name] = SentenceTransformer(model_name)
-                logger.info("Embedding model loaded successfully")
+                model = SentenceTransformer(model_name)
+                if half and model.device.type != "cpu":
+                    model.half()
+                _model_cache[cache_key] = model
+                logger.info("Embedding model loaded successfully on %s", model.device)
             except Exception as e:
                 logger.error("Failed to load model: %s", e)
                 raise
-        return _model_cache[model_name]
+        return _model_cache[cache_key]
+
+
+def get_shared_model(model_name: str = DEFAULT_MODEL) -> SentenceTransformer:
+    """
+    Get the cached model with its weights moved to shared memory.
+    
+    Pass the returned model to torch.multiprocessing workers (as a Process /
+    Pool argument) and they map the parent's tensors instead of each loading
+    a ~100 MB checkpoint from disk. Uses the "file_system" sharing strategy,
+    which avoids running out of file descriptors with many tensors.
+    """
+    import torch.multiprocessing as mp
+
+    model = get_cached_model(model_name)
+    with _cache_lock:
+        if model_name not in _shared_models:
+            mp.set_sharing_strategy("file_system")
+            model.share_memory()
+            _shared_models.add(model_name)
+    return model
 
 
 def preload_model(model_name: str = DEFAULT_MODEL) -> None:
@@ -60,17 +104,25 @@ class EmbeddingGenerator:
     Generate embeddings for text using SentenceTransformers.
     
     Uses a cached singleton model for fast repeated calls.
+    
+    Args:
+        model_name: SentenceTransformer model to load
+        precision: "float32" (default) or "float16". FP16 halves the size of
+            returned embeddings and runs the model in half precision on GPU/MPS.
     """
     
-    def __init__(self, model_name: str = DEFAULT_MODEL) -> None:
+    def __init__(self, model_name: str = DEFAULT_MODEL, precision: str = "float32") -> None:
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
         self.model_name = model_name
+        self.precision = precision
         self._model: SentenceTransformer | None = None
     
     @property
     def model(self) -> SentenceTransformer:
         """Lazy-load the model from cache."""
         if self._model is None:
-            self._model = get_cached_model(self.model_name)
+            self._model = get_cached_model(self.model_name, half=self.precision == "float16")
         return self._model
 
     def embed(self, texts: list[str]) -> np.ndarray:
@@ -81,15 +133,32 @@ class EmbeddingGenerator:
             numpy array of shape (len(texts), embedding_dim)
         """
         if not texts:
-            return np.zeros((0, 0), dtype="float32")
+            # Correctly shaped so callers can vstack/concatenate it
+            return np.empty((0, self.dimension), dtype=self.precision)
 
         embeddings = self.model.encode(
             texts,
+            batch_size=EMBED_BATCH_SIZE,
             normalize_embeddings=True,
             show_progress_bar=False,
             convert_to_numpy=True,
         )
-        return np.array(embeddings, dtype="float32")
+        # encode() already returns an ndarray; only convert if the dtype differs
+        return embeddings.astype(self.precision, copy=False)
+    
+    def embed_int8(self, texts: list[str]) -> np.ndarray:
+        """
+        Generate int8-quantized embeddings (4x smaller than float32).
+        
+        Uses symmetric quantization with the fixed INT8_SCALE; decode with
+        dequantize_int8(). Inner products are preserved up to ~1% error.
+        
+        Returns:
+            int8 numpy array of shape (len(texts), embedding_dim)
+        """
+        embeddings = self.embed(texts)
+        codes = np.rint(embeddings / np.float32(INT8_SCALE))
+        return np.clip(codes, -127, 127).astype(np.int8)
     
     @property
     def dimension(self) -> int:
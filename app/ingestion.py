@@ -1,43 +1,82 @@
 from __future__ import annotations
 
 import base64
+import csv
+import hashlib
+import io
 import logging
+import multiprocessing
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterator
 
-import pandas as pd
 from docx import Document
 from dotenv import load_dotenv
 from openai import OpenAI
+from openpyxl import load_workbook
 from PyPDF2 import PdfReader
 
 load_dotenv()
 logger = logging.getLogger("rag")
 
+# PyMuPDF extracts text in C (several times faster than PyPDF2) and releases
+# the GIL while doing so; use it when installed.
+try:
+    import pymupdf
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
 SUPPORTED_EXTENSIONS = {".txt", ".md", ".pdf", ".docx", ".csv", ".xlsx"}
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff", ".tif"}
 SUPPORTED_EXTENSIONS = SUPPORTED_EXTENSIONS | IMAGE_EXTENSIONS
 
+# Formats whose parsing is CPU-bound Python (GIL-held), worth a process pool
+CPU_BOUND_EXTENSIONS = {".pdf", ".docx", ".xlsx"}
+
 # Minimum image dimensions to process (skip icons/thumbnails)
 MIN_IMAGE_WIDTH = 200
 MIN_IMAGE_HEIGHT = 200
 
+# Max remembered image sizes per ingester
+_IMAGE_DIMS_CACHE_SIZE = 4096
 
-@dataclass(frozen=True)
-class IngestedDocument:
-    filename: str
-    filepath: str
-    content: str
+IMAGE_MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".bmp": "image/bmp",
+    ".tiff": "image/tiff",
+    ".tif": "image/tiff",
+}
 
 
 class DocumentIngester:
-    def __init__(self, docs_dir: Path, local_only: bool = False) -> None:
+    def __init__(
+        self,
+        docs_dir: Path,
+        local_only: bool = False,
+        image_cache_dir: Path | None = None,
+    ) -> None:
         self.docs_dir = docs_dir
         self.local_only = local_only  # If True, never use cloud APIs
         self._openai_client: OpenAI | None = None
+        if image_cache_dir is None:
+            from app.config import IMAGE_CACHE_DIR
+            image_cache_dir = IMAGE_CACHE_DIR
+        self.image_cache_dir = image_cache_dir
+        # (path, mtime_ns, size) -> (width, height)
+        self._image_dims: dict[tuple[str, int, int], tuple[int, int]] = {}
 
     def _get_openai_client(self) -> OpenAI | None:
         """
@@ -76,21 +115,33 @@ class DocumentIngester:
         """
         Check if image meets minimum dimension requirements.
         Skips small icons, thumbnails, and UI elements.
+        
+        PIL only parses the file header for .size. Results are remembered per
+        (path, mtime, size) so re-checks of an unchanged file skip the open.
         """
         try:
-            from PIL import Image
-            with Image.open(path) as img:
-                width, height = img.size
-                return width >= MIN_IMAGE_WIDTH and height >= MIN_IMAGE_HEIGHT
-        except ImportError:
+            st = path.stat()
+        except OSError:
+            return False
+        
+        if not PIL_AVAILABLE:
             # PIL not installed, use file size heuristic
+            return st.st_size > 50 * 1024  # > 50KB likely not an icon
+        
+        key = (str(path), st.st_mtime_ns, st.st_size)
+        dims = self._image_dims.get(key)
+        if dims is None:
             try:
-                size = path.stat().st_size
-                return size > 50 * 1024  # > 50KB likely not an icon
-            except OSError:
+                with Image.open(path) as img:
+                    dims = img.size
+            except Exception:
                 return False
-        except Exception:
-            return False
+            if len(self._image_dims) >= _IMAGE_DIMS_CACHE_SIZE:
+                self._image_dims.pop(next(iter(self._image_dims)))
+            self._image_dims[key] = dims
+        
+        width, height = dims
+        return width >= MIN_IMAGE_WIDTH and height >= MIN_IMAGE_HEIGHT
 
     def _read_image(self, path: Path) -> str:
         """
@@ -102,6 +153,8 @@ class DocumentIngester:
         - Key visual elements useful for search
         
         Skips small images (icons, thumbnails) to save API costs.
+        Descriptions are cached by image content hash, so the same image
+        (copied to several folders, or re-indexed) is only sent once.
         """
         # Skip if local-only mode
         if self.local_only:
@@ -113,29 +166,28 @@ class DocumentIngester:
             logger.debug("Skipping small image (icon/thumbnail): %s", path.name)
             return ""
         
+        try:
+            image_bytes = path.read_bytes()
+        except OSError as e:
+            logger.warning("Failed to process image %s: %s", path.name, e)
+            return ""
+        digest = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+        cache_path = self.image_cache_dir / f"{digest}.txt"
+        try:
+            description = cache_path.read_text(encoding="utf-8")
+            logger.debug("Using cached description for image: %s", path.name)
+            return f"[Image: {path.name}]\n{description}"
+        except OSError:
+            pass
+        
         client = self._get_openai_client()
         if not client:
             logger.warning("OpenAI API key not found, skipping image: %s", path.name)
             return ""
 
         try:
-            # Read and encode image as base64
-            with open(path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode("utf-8")
-
-            # Determine MIME type
-            suffix = path.suffix.lower()
-            mime_map = {
-                ".jpg": "image/jpeg",
-                ".jpeg": "image/jpeg",
-                ".png": "image/png",
-                ".gif": "image/gif",
-                ".webp": "image/webp",
-                ".bmp": "image/bmp",
-                ".tiff": "image/tiff",
-                ".tif": "image/tiff",
-            }
-            mime_type = mime_map.get(suffix, "image/jpeg")
+            image_data = base64.b64encode(image_bytes).decode("utf-8")
+            mime_type = IMAGE_MIME_TYPES.get(path.suffix.lower(), "image/jpeg")
 
             response = client.chat.completions.create(
                 model="gpt-4o",
@@ -169,6 +221,7 @@ Format your response as natural prose that will be searchable. Be thorough but c
             )
 
             description = response.choices[0].message.content.strip()
+            self._cache_image_description(cache_path, description)
             # Prefix with image metadata for context
             return f"[Image: {path.name}]\n{description}"
 
@@ -176,6 +229,16 @@ Format your response as natural prose that will be searchable. Be thorough but c
             logger.warning("Failed to process image %s: %s", path.name, e)
             return ""
 
+    def _cache_image_description(self, cache_path: Path, description: str) -> None:
+        """Persist a vision description; failures only cost a future API call."""
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            tmp_path.write_text(description, encoding="utf-8")
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.debug("Could not cache image description %s: %s", cache_path.name, e)
+
     def ingest_all(self, parallel: bool = False, max_workers: int = 4) -> list[dict[str, str]]:
         """
         Ingest all documents from the docs directory.
@@ -187,17 +250,26 @@ Format your response as natural prose that will be searchable. Be thorough but c
         Returns:
             List of dicts with filename, filepath, and content.
         """
+        documents = list(self.iter_all(parallel=parallel, max_workers=max_workers))
+        if not documents:
+            raise RuntimeError("All documents were empty after ingestion.")
+        return documents
+
+    def iter_all(self, parallel: bool = False, max_workers: int = 4) -> Iterator[dict[str, str]]:
+        """
+        Stream documents from the docs directory one at a time.
+        
+        Same as ingest_all(), but yields each document as it is read so
+        callers can chunk/embed without holding every file's text in memory.
+        Directory errors are raised immediately, not on first iteration.
+        """
         if not self.docs_dir.exists():
             raise RuntimeError(
                 f"Docs directory not found: {self.docs_dir}. "
                 "Create it and add files before indexing."
             )
 
-        files = [
-            path
-            for path in self.docs_dir.rglob("*")
-            if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
-        ]
+        files = list(_iter_supported_files(self.docs_dir))
         if not files:
             raise RuntimeError(
                 f"No supported documents found in {self.docs_dir}. "
@@ -205,76 +277,68 @@ Format your response as natural prose that will be searchable. Be thorough but c
             )
 
         if parallel:
-            documents = self._ingest_parallel(files, max_workers)
-        else:
-            documents = self._ingest_sequential(files)
-
-        if not documents:
-            raise RuntimeError("All documents were empty after ingestion.")
+            return self._ingest_parallel(files, max_workers)
+        return self._ingest_sequential(files)
 
-        return [
-            {
-                "filename": doc.filename,
-                "filepath": doc.filepath,
-                "content": doc.content,
-            }
-            for doc in documents
-        ]
+    @staticmethod
+    def _to_record(path: Path, content: str) -> dict[str, str] | None:
+        """Build the document dict, or None if the file had no text."""
+        if not content.strip():
+            return None
+        return {"filename": path.name, "filepath": str(path), "content": content}
     
-    def _ingest_sequential(self, files: list[Path]) -> list[IngestedDocument]:
+    def _ingest_sequential(self, files: list[Path]) -> Iterator[dict[str, str]]:
         """Process files sequentially."""
-        documents: list[IngestedDocument] = []
         for path in files:
-            content = self._read_file(path)
-            if content.strip():
-                documents.append(
-                    IngestedDocument(
-                        filename=path.name,
-                        filepath=str(path),
-                        content=content,
-                    )
-                )
-        return documents
+            record = self._to_record(path, self._read_file(path))
+            if record:
+                yield record
     
     def _ingest_parallel(
         self, 
         files: list[Path], 
         max_workers: int
-    ) -> list[IngestedDocument]:
+    ) -> Iterator[dict[str, str]]:
         """
-        Process files in parallel using ThreadPoolExecutor.
+        Process files in parallel.
         
-        Uses threads (not processes) because file I/O is the bottleneck.
-        """
-        documents: list[IngestedDocument] = []
+        PDF/DOCX/XLSX parsing is CPU-bound and holds the GIL, so those files
+        go to a ProcessPoolExecutor; plain text and images (I/O and network
+        bound) stay on a ThreadPoolExecutor. Documents are yielded in
+        completion order.
         
-        def process_file(path: Path) -> IngestedDocument | None:
-            try:
-                content = self._read_file(path)
-                if content.strip():
-                    return IngestedDocument(
-                        filename=path.name,
-                        filepath=str(path),
-                        content=content,
-                    )
-            except Exception as e:
-                logger.warning("Failed to process %s: %s", path.name, e)
-            return None
+        Workers are spawned rather than forked, so starting them never
+        copies a lock held by another thread (a reader or the caller's).
+        """
+        cpu_bound = [p for p in files if p.suffix.lower() in CPU_BOUND_EXTENSIONS]
+        io_bound = [p for p in files if p.suffix.lower() not in CPU_BOUND_EXTENSIONS]
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all files
-            future_to_path = {
-                executor.submit(process_file, path): path 
-                for path in files
-            }
+        with ExitStack() as stack:
+            future_to_path = {}
+            if cpu_bound:
+                processes = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=min(os.cpu_count() or 1, len(cpu_bound)),
+                    mp_context=multiprocessing.get_context("spawn"),
+                ))
+                future_to_path.update(
+                    {processes.submit(_read_file_worker, str(path)): path for path in cpu_bound}
+                )
             
-            # Collect results as they complete
+            threads = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+            future_to_path.update(
+                {threads.submit(self._read_file, path): path for path in io_bound}
+            )
+            
+            # Yield results as they complete
             for future in as_completed(future_to_path):
-                result = future.result()
+                path = future_to_path[future]
+                try:
+                    result = self._to_record(path, future.result())
+                except Exception as e:
+                    logger.warning("Failed to process %s: %s", path.name, e)
+                    continue
                 if result:
-                    documents.append(result)
-        
-        return documents
+                    yield result
     
     def ingest_files(
         self,
@@ -298,21 +362,15 @@ Format your response as natural prose that will be searchable. Be thorough but c
         if not file_paths:
             return []
         
-        documents: list[IngestedDocument] = []
+        documents: list[dict[str, str]] = []
         total = len(file_paths)
         
-        def process_file(path: Path, index: int) -> IngestedDocument | None:
+        def process_file(path: Path, index: int) -> dict[str, str] | None:
             try:
                 if progress_callback:
                     progress_callback(path.name, index, total)
                 
-                content = self._read_file(path)
-                if content.strip():
-                    return IngestedDocument(
-                        filename=path.name,
-                        filepath=str(path),
-                        content=content,
-                    )
+                return self._to_record(path, self._read_file(path))
             except Exception as e:
                 logger.warning("Failed to process %s: %s", path.name, e)
             return None
@@ -333,14 +391,49 @@ Format your response as natural prose that will be searchable. Be thorough but c
                 if result:
                     documents.append(result)
         
-        return [
-            {
-                "filename": doc.filename,
-                "filepath": doc.filepath,
-                "content": doc.content,
-            }
-            for doc in documents
-        ]
+        return documents
+
+    def _read_file_stream(self, path: Path) -> Iterator[str]:
+        """
+        Yield a file's text in pieces suitable for chunker.chunk().
+        
+        PDFs are yielded page by page so the whole document is never held as
+        one string; other formats are yielded as a single piece.
+        """
+        if path.suffix.lower() != ".pdf":
+            yield self._read_file(path)
+            return
+        try:
+            yield from self._read_pdf_pages(path)
+        except Exception as exc:
+            raise RuntimeError(f"Failed to read {path}") from exc
+
+    @staticmethod
+    def _read_pdf_pages(path: Path) -> Iterator[str]:
+        if PYMUPDF_AVAILABLE:
+            with pymupdf.open(str(path)) as doc:
+                for page in doc:
+                    yield page.get_text("text")
+            return
+        reader = PdfReader(str(path))
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+    @staticmethod
+    def _read_xlsx(path: Path) -> str:
+        """Render every sheet of a workbook as CSV text, streaming rows."""
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            out = io.StringIO()
+            writer = csv.writer(out, lineterminator="\n")
+            for sheet in workbook.worksheets:
+                writer.writerows(
+                    ["" if cell is None else cell for cell in row]
+                    for row in sheet.iter_rows(values_only=True)
+                )
+            return out.getvalue()
+        finally:
+            workbook.close()
 
     def _read_file(self, path: Path) -> str:
         suffix = path.suffix.lower()
@@ -348,20 +441,50 @@ Format your response as natural prose that will be searchable. Be thorough but c
             if suffix in {".txt", ".md"}:
                 return path.read_text(encoding="utf-8", errors="ignore")
             if suffix == ".pdf":
-                reader = PdfReader(str(path))
-                return "\n".join(page.extract_text() or "" for page in reader.pages)
+                return "\n".join(self._read_pdf_pages(path))
             if suffix == ".docx":
                 doc = Document(str(path))
                 return "\n".join(p.text for p in doc.paragraphs)
             if suffix == ".csv":
-                df = pd.read_csv(path)
-                return df.to_csv(index=False)
+                # Already CSV text; parsing into a DataFrame and re-serializing
+                # it was a round trip that changed nothing we index.
+                return path.read_text(encoding="utf-8", errors="ignore")
             if suffix == ".xlsx":
-                df = pd.read_excel(path)
-                return df.to_csv(index=False)
+                return self._read_xlsx(path)
             if suffix in IMAGE_EXTENSIONS:
                 return self._read_image(path)
         except Exception as exc:
             raise RuntimeError(f"Failed to read {path}") from exc
 
         raise RuntimeError(f"Unsupported file type: {path}")
+
+
+def _read_file_worker(path_str: str) -> str:
+    """Process-pool entry point for parsing one CPU-bound document."""
+    path = Path(path_str)
+    return DocumentIngester(path.parent, local_only=True)._read_file(path)
+
+
+def _iter_supported_files(root: Path) -> Iterator[Path]:
+    """
+    Walk a directory tree yielding files with supported extensions.
+    
+    Uses os.scandir so file-type checks come from the directory listing
+    (no stat per entry on most filesystems) and Path objects are only built
+    for matches. Like Path.rglob, symlinked directories are not descended
+    into; unreadable directories are skipped.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif (
+                        os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS
+                        and entry.is_file()
+                    ):
+                        yield Path(entry.path)
+        except OSError:
+            continue
@@ -6,52 +6,93 @@ This module handles all LLM interactions for the answer layer.
 """
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import logging
+import re
+import threading
+from collections import OrderedDict
 from typing import Generator, Callable
 
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from app.chunker import split_sentences
+
 load_dotenv()
 logger = logging.getLogger("rag")
 
 _client: OpenAI | None = None
 
+# Result caches for repeat (query, chunk) extractions and compressions.
+# Keyed by content digests rather than the texts themselves so large chunks
+# aren't pinned in memory; bounded LRU via OrderedDict.
+_CACHE_MAX_ENTRIES = 4096
+_extract_cache: OrderedDict[tuple[str, str], dict] = OrderedDict()
+_compress_cache: OrderedDict[str, str] = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Markdown code fence the model sometimes wraps JSON in; the info string on
+# the opening line (json, JSON, javascript, ...) is dropped whatever it is
+_FENCE_RE = re.compile(r"^```[^\n]*\n(.*?)\n?```\s*$", re.DOTALL)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _cache_get(cache: OrderedDict, key):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key, value) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > _CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """Drop all cached LLM results."""
+    with _cache_lock:
+        _extract_cache.clear()
+        _compress_cache.clear()
+
+
+def _get_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY not found in .env")
+    # Strip whitespace in case of formatting issues
+    return api_key.strip()
+
 
 def get_client() -> OpenAI:
     """Get or create OpenAI client (singleton)."""
     global _client
     if _client is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not found in .env")
-        # Strip whitespace in case of formatting issues
-        api_key = api_key.strip()
-        _client = OpenAI(api_key=api_key)
+        _client = OpenAI(api_key=_get_api_key())
     return _client
 
 
-def extract_answer_from_chunk(query: str, chunk_text: str) -> dict:
-    """
-    Use GPT to extract the smallest answer span from a chunk.
-    
-    This is the core extractive QA call. The model is instructed to:
-    - Copy the smallest span that answers the question
-    - Never invent facts not in the text
-    - Return "NONE" if no answer is present
-    
-    Returns:
-        {"answer": str or "NONE", "confidence": float 0-1}
-    """
-    client = get_client()
-    
-    system_prompt = """You are an extraction engine for a personal factual recall system.
+_EXTRACT_SYSTEM_PROMPT = """You are an extraction engine for a personal factual recall system.
 You ONLY extract short answers that are explicitly stated in the given text.
 You NEVER invent or infer facts not literally present.
 You respond ONLY in valid JSON format."""
 
+
+def _extraction_request(query: str, chunk_text: str) -> dict:
+    """Build the chat.completions arguments for an extraction call."""
     user_prompt = f"""Question: {query}
 
 Text:
@@ -67,36 +108,64 @@ Instructions:
 Respond in JSON ONLY with this exact format:
 {{"answer": "<copied span or NONE>", "confidence": <number between 0.0 and 1.0>}}"""
 
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": _EXTRACT_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        "temperature": 0.0,
+        "max_tokens": 150,
+    }
+
+
+def _parse_extraction(content: str) -> dict:
+    """Parse the model's JSON reply. Raises json.JSONDecodeError if invalid."""
+    content = content.strip()
+    
+    # Handle markdown code blocks if present
+    if match := _FENCE_RE.match(content):
+        content = match.group(1).strip()
+    
+    # Parse JSON response
+    result = json.loads(content)
+    
+    answer = result.get("answer", "NONE")
+    confidence = float(result.get("confidence", 0.0))
+    
+    # Validate
+    if not answer or answer.upper() == "NONE":
+        return {"answer": "NONE", "confidence": 0.0}
+    
+    return {"answer": answer, "confidence": min(max(confidence, 0.0), 1.0)}
+
+
+def extract_answer_from_chunk(query: str, chunk_text: str) -> dict:
+    """
+    Use GPT to extract the smallest answer span from a chunk.
+    
+    This is the core extractive QA call. The model is instructed to:
+    - Copy the smallest span that answers the question
+    - Never invent facts not in the text
+    - Return "NONE" if no answer is present
+    
+    Results are cached per (normalized query, chunk); failed calls are not.
+    
+    Returns:
+        {"answer": str or "NONE", "confidence": float 0-1}
+    """
+    cache_key = (_normalize_query(query), _digest(chunk_text))
+    cached = _cache_get(_extract_cache, cache_key)
+    if cached is not None:
+        return dict(cached)
+    
+    client = get_client()
+    
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.0,
-            max_tokens=150,
-        )
-        
-        content = response.choices[0].message.content.strip()
-        
-        # Handle markdown code blocks if present
-        if content.startswith("```"):
-            lines = content.split("\n")
-            content = "\n".join(lines[1:-1]) if len(lines) > 2 else content
-            content = content.strip()
-        
-        # Parse JSON response
-        result = json.loads(content)
-        
-        answer = result.get("answer", "NONE")
-        confidence = float(result.get("confidence", 0.0))
-        
-        # Validate
-        if not answer or answer.upper() == "NONE":
-            return {"answer": "NONE", "confidence": 0.0}
-        
-        return {"answer": answer, "confidence": min(max(confidence, 0.0), 1.0)}
+        response = client.chat.completions.create(**_extraction_request(query, chunk_text))
+        extracted = _parse_extraction(response.choices[0].message.content)
+        _cache_put(_extract_cache, cache_key, extracted)
+        return dict(extracted)
         
     except json.JSONDecodeError as e:
         logger.warning("LLM returned invalid JSON: %s", e)
@@ -106,6 +175,36 @@ Respond in JSON ONLY with this exact format:
         return {"answer": "NONE", "confidence": 0.0}
 
 
+_WORD_STRIP = ".,;:!?()[]\"'"
+
+# Capitalized only because they open a sentence; any other capitalized word,
+# even a sentence-initial one, may be a name
+_SENTENCE_STARTERS = frozenset({
+    "A", "An", "The", "This", "That", "These", "Those", "There", "It", "Its",
+    "He", "She", "They", "We", "I", "You", "His", "Her", "Their", "Our", "My",
+    "In", "On", "At", "For", "From", "With", "After", "Before", "But", "And",
+    "So", "Then", "When", "If", "As", "Also",
+})
+
+
+def _words(text: str) -> set[str]:
+    """Whitespace-separated words with surrounding punctuation removed."""
+    return {word.strip(_WORD_STRIP) for word in text.split()}
+
+
+def _key_tokens(text: str) -> set[str]:
+    """Numbers and capitalized words (names): facts a summary must keep."""
+    keys: set[str] = set()
+    for sentence in split_sentences(text):
+        for i, word in enumerate(sentence.split()):
+            word = word.strip(_WORD_STRIP)
+            if any(c.isdigit() for c in word) or (
+                word[:1].isupper() and not (i == 0 and word in _SENTENCE_STARTERS)
+            ):
+                keys.add(word)
+    return keys
+
+
 def compress_answer(answer: str) -> str:
     """
     Use GPT to compress a long answer into ≤1 sentence.
@@ -118,6 +217,22 @@ def compress_answer(answer: str) -> str:
     if not answer or len(answer.split()) <= 25:
         return answer
     
+    # Long extractive answers are often one key sentence plus padding. If the
+    # first sentence fits and already carries every number and name from the
+    # rest (as whole words, so "5" isn't found inside "$15,000"), use it and
+    # skip the API call.
+    sentences = split_sentences(answer)
+    first_sentence = sentences[0]
+    if len(first_sentence.split()) <= 25 and _key_tokens(
+        " ".join(sentences[1:])
+    ) <= _words(first_sentence):
+        return first_sentence
+    
+    cache_key = _digest(answer)
+    cached = _cache_get(_compress_cache, cache_key)
+    if cached is not None:
+        return cached
+    
     client = get_client()
     
     try:
@@ -150,8 +265,9 @@ Respond with ONLY the compressed sentence, nothing else.""",
         
         # Validate it's not longer than original
         if len(compressed.split()) > len(answer.split()):
-            return answer
+            compressed = answer
         
+        _cache_put(_compress_cache, cache_key, compressed)
         return compressed
         
     except Exception as e:
@@ -318,10 +434,8 @@ Extract the shortest answer span. JSON only:"""
         content = "".join(full_response).strip()
         
         # Parse JSON
-        if content.startswith("```"):
-            lines = content.split("\n")
-            content = "\n".join(lines[1:-1]) if len(lines) > 2 else content
-            content = content.strip()
+        if match := _FENCE_RE.match(content):
+            content = match.group(1).strip()
         
         result = json.loads(content)
         answer = result.get("answer", "NONE")
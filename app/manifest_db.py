@@ -25,6 +25,7 @@ class SQLiteManifest:
     - O(1) file lookups by path
     - Efficient queries for files modified since date
     - Atomic updates with transactions
+    - WAL journaling so readers don't block a running scan
     - Backward compatible with JSON manifest
     """
     
@@ -37,6 +38,8 @@ class SQLiteManifest:
     def _init_db(self) -> None:
         """Initialize the database schema."""
         with self._connection() as conn:
+            # Persistent per database file; lets readers run during writes
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.executescript("""
                 CREATE TABLE IF NOT EXISTS schema_version (
                     version INTEGER PRIMARY KEY
@@ -70,12 +73,19 @@ class SQLiteManifest:
                     (self.SCHEMA_VERSION,)
                 )
     
-    @contextmanager
-    def _connection(self) -> Generator[sqlite3.Connection, None, None]:
-        """Get a database connection with proper cleanup."""
+    def _open(self) -> sqlite3.Connection:
+        """Open a new connection to the manifest database."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         conn = sqlite3.connect(str(self.db_path))
         conn.row_factory = sqlite3.Row
+        # Safe with WAL: a crash can lose the last commits but not corrupt
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    @contextmanager
+    def _connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """Get a database connection with proper cleanup."""
+        conn = self._open()
         try:
             yield conn
             conn.commit()
@@ -231,9 +241,30 @@ class SQLiteManifest:
             return {row["filepath"] for row in cursor.fetchall()}
     
     def find_deleted_files(self, current_files: set[str]) -> set[str]:
-        """Find files in manifest that no longer exist."""
-        indexed = self.get_indexed_filepaths()
-        return indexed - current_files
+        """
+        Find files in manifest that no longer exist.
+        
+        The current paths are loaded into a temporary table so the
+        difference is computed by SQLite with an EXCEPT query.
+        """
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS current_files "
+                "(filepath TEXT PRIMARY KEY)"
+            )
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO current_files (filepath) VALUES (?)",
+                    ((fp,) for fp in current_files)
+                )
+                cursor = conn.execute("""
+                    SELECT filepath FROM files
+                    EXCEPT
+                    SELECT filepath FROM current_files
+                """)
+                return {row["filepath"] for row in cursor.fetchall()}
+            finally:
+                conn.execute("DROP TABLE current_files")
     
     # ========================================================================
     # Statistics
@@ -0,0 +1,59 @@
+"""
+Shared locking and atomic writes for the scan manifest.
+
+Both the scanner (ScanManifest.save) and privacy controls
+(PrivacyManager.delete_files_from_index) rewrite scan_manifest.json.
+They serialize on a sibling ``.lock`` file and replace the manifest
+atomically, so a crash or a concurrent reader never sees a partial file.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generator
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows
+    FCNTL_AVAILABLE = False
+
+
+def manifest_lock_path(manifest_path: Path) -> Path:
+    """Lock file guarding writes to ``manifest_path``."""
+    return manifest_path.with_name(manifest_path.name + ".lock")
+
+
+@contextmanager
+def manifest_lock(manifest_path: Path) -> Generator[None, None, None]:
+    """
+    Hold an exclusive advisory lock for a manifest read-modify-write.
+    
+    The lock lives on a separate file because the manifest itself is
+    replaced on every write. Without fcntl (Windows) this is a no-op.
+    """
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_lock_path(manifest_path), "ab") as lock_file:
+        if FCNTL_AVAILABLE:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        # Lock is released when the file is closed
+        yield
+
+
+def write_manifest(manifest_path: Path, payload: bytes) -> None:
+    """Write ``payload`` to a temp file beside the manifest and swap it in."""
+    fd, tmp_name = tempfile.mkstemp(
+        dir=manifest_path.parent, prefix=manifest_path.name + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_name, manifest_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
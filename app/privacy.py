@@ -10,17 +10,143 @@ Provides:
 from __future__ import annotations
 
 import csv
+import heapq
 import json
 import logging
+import mmap
+import os
 import shutil
 from datetime import datetime
+from functools import cached_property
+from itertools import islice
 from pathlib import Path
+from typing import BinaryIO, Iterable
 
 from app.config import DATA_DIR, INDEX_PATH, ensure_data_dir
-from app.security import get_audit_logger
+from app.manifest_io import manifest_lock, manifest_lock_path, write_manifest
+from app.security import AuditLogger, KeyManager, get_audit_logger
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger("rag.privacy")
 
+# Rows serialized and written per batch when exporting large manifests
+_EXPORT_BATCH_SIZE = 1024
+
+# Manifests above this size are parsed straight from a read-only mapping
+# rather than first being copied into a bytes object.
+_MMAP_THRESHOLD = 4 * 1024 * 1024
+
+
+def _json_loads(data: bytes):
+    """Parse JSON bytes, using orjson's C parser when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj, indent: bool = True) -> bytes:
+    """Serialize to JSON bytes, 2-space indented unless ``indent`` is False."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+
+def _write_json_stream(
+    f: BinaryIO, header: dict, list_key: str, items: Iterable[dict]
+) -> None:
+    """
+    Write ``{**header, list_key: [*items]}`` as JSON without building the list.
+    
+    Items are serialized ``_EXPORT_BATCH_SIZE`` at a time, one per line, so
+    peak memory stays bounded however many items there are.
+    """
+    f.write(b"{\n")
+    for key, value in header.items():
+        f.write(b"  %s: %s,\n" % (_json_dumps(key), _json_dumps(value, indent=False)))
+    f.write(b"  %s: [" % _json_dumps(list_key))
+    
+    items = iter(items)
+    empty = True
+    while batch := list(islice(items, _EXPORT_BATCH_SIZE)):
+        f.write(b"\n    " if empty else b",\n    ")
+        f.write(b",\n    ".join(_json_dumps(item, indent=False) for item in batch))
+        empty = False
+    f.write(b"]\n}\n" if empty else b"\n  ]\n}\n")
+
+
+def _collect_file_sizes(root: Path) -> dict[str, int]:
+    """
+    Map the path of every file under ``root`` to its size in bytes.
+    
+    Walks with os.scandir and uses the entry's cached stat, so each file
+    costs at most one lstat. Symlinks are not followed; unreadable
+    entries are skipped.
+    """
+    sizes: dict[str, int] = {}
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            sizes[entry.path] = entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
+        except OSError:
+            continue
+    return sizes
+
+
+def _lookup_size(sizes: dict[str, int], path: Path) -> int:
+    """Size of ``path`` from a _collect_file_sizes() walk, or 0 if missing."""
+    size = sizes.get(str(path))
+    if size is None:
+        # Outside the walked tree (e.g. a relocated INDEX_PATH)
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = 0
+    return size
+
+
+def _copy_file(src: Path, dst: Path) -> None:
+    """
+    Copy ``src`` to ``dst`` (data and permission bits, like shutil.copy).
+    
+    Uses os.copy_file_range so the data never passes through user space;
+    falls back to shutil.copy where that is unavailable or unsupported
+    (e.g. across filesystems on older kernels).
+    """
+    if hasattr(os, "copy_file_range"):
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            st = os.fstat(src_fd)
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.fchmod(dst_fd, st.st_mode & 0o777)
+                remaining = st.st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return
+            except OSError as e:
+                logger.debug("copy_file_range failed (%s), using shutil.copy", e)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+    shutil.copy(src, dst)
+
 
 class PrivacyManager:
     """
@@ -35,40 +161,89 @@ class PrivacyManager:
     
     def __init__(self, data_dir: Path | None = None):
         self.data_dir = data_dir or DATA_DIR
-        self.audit = get_audit_logger(self.data_dir)
+        # (st_mtime_ns, st_size, parsed manifest) of the last manifest read
+        self._manifest_cache: tuple[int, int, dict] | None = None
+    
+    @cached_property
+    def audit(self) -> AuditLogger:
+        """Audit logger, created on first use so read-only callers skip it."""
+        return get_audit_logger(self.data_dir)
+    
+    def _load_manifest(self) -> dict:
+        """
+        Load scan_manifest.json, reusing the parsed copy while it is unchanged.
+        
+        The cache is keyed by the file's mtime and size, so any rewrite of the
+        manifest (by the scanner or by this class) is picked up on the next
+        call. Returns an empty dict if there is no manifest.
+        
+        Callers must treat the returned dict as read-only.
+        """
+        manifest_path = self.data_dir / "scan_manifest.json"
+        try:
+            st = manifest_path.stat()
+        except FileNotFoundError:
+            self._manifest_cache = None
+            return {}
+        
+        cached = self._manifest_cache
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        
+        with open(manifest_path, "rb") as f:
+            return self._parse_manifest(f, st)
+    
+    def _parse_manifest(self, f: BinaryIO, st: os.stat_result) -> dict:
+        """Parse an open manifest file (stat'd as ``st``) and cache the result."""
+        if ORJSON_AVAILABLE and st.st_size > _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                    memoryview(mm) as view:
+                data = orjson.loads(view)
+        else:
+            data = _json_loads(f.read())
+        self._manifest_cache = (st.st_mtime_ns, st.st_size, data)
+        return data
     
     # ========================================================================
     # Data Visibility
     # ========================================================================
     
-    def list_indexed_files(self) -> list[dict]:
+    def list_indexed_files(self, limit: int | None = None, sort: bool = True) -> list[dict]:
         """
-        List all files currently in the index.
+        List files currently in the index.
+        
+        Args:
+            limit: Return at most this many files (all if None)
+            sort: Order by indexed_at, newest first; otherwise manifest order
         
         Returns list of dicts with: filepath, filename, indexed_at, chunk_count
         """
-        manifest_path = self.data_dir / "scan_manifest.json"
-        
-        if not manifest_path.exists():
-            return []
-        
         try:
-            with open(manifest_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            items = self._load_manifest().get("files", {}).items()
+            
+            if sort:
+                def _indexed_at(item):
+                    return item[1].get("indexed_at", "unknown")
+                
+                # A heap selects the newest `limit` entries in O(n log limit)
+                # without sorting the whole manifest.
+                if limit is not None:
+                    items = heapq.nlargest(limit, items, key=_indexed_at)
+                else:
+                    items = sorted(items, key=_indexed_at, reverse=True)
+            elif limit is not None:
+                items = islice(items, limit)
             
-            files = []
-            for filepath, info in data.get("files", {}).items():
-                files.append({
+            return [
+                {
                     "filepath": filepath,
-                    "filename": Path(filepath).name,
+                    "filename": os.path.basename(filepath),
                     "indexed_at": info.get("indexed_at", "unknown"),
                     "chunk_count": info.get("chunk_count", 0),
                     "size_bytes": info.get("size", 0),
-                })
-            
-            # Sort by indexed_at descending
-            files.sort(key=lambda x: x["indexed_at"], reverse=True)
-            return files
+                }
+                for filepath, info in items
+            ]
         
         except Exception as e:
             logger.error("Failed to list indexed files: %s", e)
@@ -76,7 +251,11 @@ class PrivacyManager:
     
     def get_indexed_file_count(self) -> int:
         """Get count of indexed files."""
-        return len(self.list_indexed_files())
+        try:
+            return len(self._load_manifest().get("files", {}))
+        except Exception as e:
+            logger.error("Failed to count indexed files: %s", e)
+            return 0
     
     def get_storage_stats(self) -> dict:
         """
@@ -98,45 +277,34 @@ class PrivacyManager:
             "total_storage_mb": 0.0,
         }
         
+        # Size every stored file in one walk; component sizes below are
+        # looked up here instead of being stat'd again.
+        sizes = _collect_file_sizes(self.data_dir)
+        
         # Count files and chunks from manifest
         manifest_path = self.data_dir / "scan_manifest.json"
-        if manifest_path.exists():
-            try:
-                with open(manifest_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                files = data.get("files", {})
-                stats["total_files"] = len(files)
-                stats["total_chunks"] = sum(
-                    f.get("chunk_count", 0) for f in files.values()
-                )
-                stats["manifest_size_kb"] = manifest_path.stat().st_size / 1024
-            except Exception:
-                pass
+        try:
+            files = self._load_manifest().get("files", {})
+            stats["total_files"] = len(files)
+            stats["total_chunks"] = sum(
+                f.get("chunk_count", 0) for f in files.values()
+            )
+            stats["manifest_size_kb"] = _lookup_size(sizes, manifest_path) / 1024
+        except Exception:
+            pass
         
         # Get index size
         faiss_path = Path(str(INDEX_PATH) + ".faiss")
         pkl_path = Path(str(INDEX_PATH) + ".pkl")
-        
-        if faiss_path.exists():
-            stats["index_size_mb"] += faiss_path.stat().st_size / (1024 * 1024)
-        if pkl_path.exists():
-            stats["index_size_mb"] += pkl_path.stat().st_size / (1024 * 1024)
-        
-        # Round index size
-        stats["index_size_mb"] = round(stats["index_size_mb"], 2)
+        index_bytes = _lookup_size(sizes, faiss_path) + _lookup_size(sizes, pkl_path)
+        stats["index_size_mb"] = round(index_bytes / (1024 * 1024), 2)
         
         # Get audit log stats
         audit_stats = self.audit.get_stats()
         stats["audit_log_entries"] = audit_stats.get("total_entries", 0)
         
         # Calculate total storage
-        total_bytes = 0
-        for path in self.data_dir.rglob("*"):
-            if path.is_file():
-                try:
-                    total_bytes += path.stat().st_size
-                except OSError:
-                    pass
+        total_bytes = sum(sizes.values())
         stats["total_storage_mb"] = round(total_bytes / (1024 * 1024), 2)
         
         return stats
@@ -158,29 +326,29 @@ class PrivacyManager:
             return False
         
         try:
-            with open(manifest_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = self._load_manifest()
+            files = data.get("files", {})
             
             # Make it human-readable
-            export_data = {
+            header = {
                 "export_date": datetime.now().isoformat(),
                 "description": "List of all files indexed by RAG Personal Search",
-                "total_files": len(data.get("files", {})),
+                "total_files": len(files),
                 "last_full_scan": data.get("last_full_scan"),
-                "files": []
             }
-            
-            for filepath, info in data.get("files", {}).items():
-                export_data["files"].append({
+            entries = (
+                {
                     "path": filepath,
-                    "name": Path(filepath).name,
+                    "name": os.path.basename(filepath),
                     "indexed_at": info.get("indexed_at"),
                     "chunks_created": info.get("chunk_count"),
                     "file_size_bytes": info.get("size"),
-                })
+                }
+                for filepath, info in files.items()
+            )
             
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(export_data, f, indent=2)
+            with open(output_path, "wb") as f:
+                _write_json_stream(f, header, "files", entries)
             
             self.audit.log_data_export("manifest", str(output_path))
             logger.info("Exported manifest to %s", output_path)
@@ -195,20 +363,41 @@ class PrivacyManager:
         Export list of indexed files as CSV.
         
         Columns: filepath, filename, indexed_at, chunk_count, size_bytes
+        
+        Rows are written in manifest order.
         """
-        files = self.list_indexed_files()
+        try:
+            files = self._load_manifest().get("files", {})
+        except Exception as e:
+            logger.error("Failed to read manifest for CSV export: %s", e)
+            return False
         
         if not files:
             logger.warning("No files to export")
             return False
         
+        rows = (
+            (
+                filepath,
+                os.path.basename(filepath),
+                info.get("indexed_at", "unknown"),
+                info.get("chunk_count", 0),
+                info.get("size", 0),
+            )
+            for filepath, info in files.items()
+        )
+        
         try:
-            with open(output_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=[
-                    "filepath", "filename", "indexed_at", "chunk_count", "size_bytes"
-                ])
-                writer.writeheader()
-                writer.writerows(files)
+            # Large buffer so rows reach the OS in a few big writes
+            with open(
+                output_path, "w", newline="", encoding="utf-8", buffering=1 << 20
+            ) as f:
+                writer = csv.writer(f)
+                writer.writerow(
+                    ("filepath", "filename", "indexed_at", "chunk_count", "size_bytes")
+                )
+                while batch := list(islice(rows, _EXPORT_BATCH_SIZE)):
+                    writer.writerows(batch)
             
             self.audit.log_data_export("files_csv", str(output_path))
             logger.info("Exported %d files to %s", len(files), output_path)
@@ -229,7 +418,7 @@ class PrivacyManager:
             return False
         
         try:
-            shutil.copy(audit_path, output_path)
+            _copy_file(audit_path, output_path)
             self.audit.log_data_export("audit_log", str(output_path))
             logger.info("Exported audit log to %s", output_path)
             return True
@@ -260,8 +449,7 @@ class PrivacyManager:
         try:
             stats = self.get_storage_stats()
             stats["export_date"] = datetime.now().isoformat()
-            with open(output_dir / "stats.json", "w", encoding="utf-8") as f:
-                json.dump(stats, f, indent=2)
+            (output_dir / "stats.json").write_bytes(_json_dumps(stats))
             results["stats"] = True
         except Exception:
             results["stats"] = False
@@ -278,30 +466,64 @@ class PrivacyManager:
         
         Note: Vectors remain in FAISS until full rebuild.
         """
-        manifest_path = self.data_dir / "scan_manifest.json"
+        return self.delete_files_from_index([filepath]) == 1
+    
+    def delete_files_from_index(self, filepaths: Iterable[str]) -> int:
+        """
+        Remove several files from the manifest with a single rewrite.
+        
+        The read-modify-write holds the manifest lock (an advisory flock,
+        also taken by ScanManifest.save), so concurrent deletions don't lose
+        each other's updates, and the new manifest replaces the old one
+        atomically. A scan that loaded the manifest earlier will still write
+        its own copy back on its next save. Without fcntl there is no lock.
+        
+        Args:
+            filepaths: Manifest keys to remove; unknown paths are ignored
+            
+        Returns:
+            Number of files actually removed
         
+        Note: Vectors remain in FAISS until full rebuild.
+        """
+        manifest_path = self.data_dir / "scan_manifest.json"
         if not manifest_path.exists():
-            return False
+            return 0
         
         try:
-            with open(manifest_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            if filepath in data.get("files", {}):
-                del data["files"][filepath]
+            with manifest_lock(manifest_path):
+                try:
+                    with open(manifest_path, "rb") as f:
+                        st = os.fstat(f.fileno())
+                        cached = self._manifest_cache
+                        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                            data = cached[2]
+                        else:
+                            data = self._parse_manifest(f, st)
+                except FileNotFoundError:
+                    return 0
                 
-                with open(manifest_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2)
+                files = data.get("files", {})
+                removed = [fp for fp in dict.fromkeys(filepaths) if fp in files]
+                if not removed:
+                    return 0
                 
-                self.audit.log_file_deleted(filepath)
-                logger.info("Removed from index: %s", filepath)
-                return True
+                # Edit a copy so the cached manifest stays intact if the
+                # write fails; the new file invalidates the cache anyway.
+                remaining = dict(files)
+                for fp in removed:
+                    del remaining[fp]
+                write_manifest(manifest_path, _json_dumps({**data, "files": remaining}))
             
-            return False
+            with self.audit.batch():
+                for fp in removed:
+                    self.audit.log_file_deleted(fp)
+                    logger.info("Removed from index: %s", fp)
+            return len(removed)
         
         except Exception as e:
             logger.error("Failed to delete file from index: %s", e)
-            return False
+            return 0
     
     def delete_index(self) -> bool:
         """
@@ -375,7 +597,8 @@ class PrivacyManager:
         - Metadata pickle
         - File manifest
         - Audit log
-        - Encryption keys/salt
+        - Encryption keys/salt (and cached derived keys)
+        - Cached image descriptions
         """
         if not confirm:
             logger.error("delete_all_data requires confirm=True")
@@ -387,43 +610,38 @@ class PrivacyManager:
             
             deleted_items = []
             
-            # Delete index files
-            for suffix in [".faiss", ".pkl"]:
-                path = Path(str(INDEX_PATH) + suffix)
-                if path.exists():
-                    path.unlink()
-                    deleted_items.append(path.name)
-            
-            # Delete manifest
-            manifest_path = self.data_dir / "scan_manifest.json"
-            if manifest_path.exists():
-                manifest_path.unlink()
-                deleted_items.append("scan_manifest.json")
-            
-            # Delete index manifest (old format)
-            old_manifest = self.data_dir / "index_manifest.json"
-            if old_manifest.exists():
-                old_manifest.unlink()
-                deleted_items.append("index_manifest.json")
-            
-            # Delete audit log
-            audit_path = self.data_dir / "audit.log"
-            if audit_path.exists():
-                audit_path.unlink()
-                deleted_items.append("audit.log")
+            index_base = str(INDEX_PATH)
+            data_dir = str(self.data_dir)
+            candidates = (
+                index_base + ".faiss",  # FAISS index
+                index_base + ".pkl",  # Metadata pickle
+                os.path.join(data_dir, "scan_manifest.json"),  # Manifest
+                str(manifest_lock_path(self.data_dir / "scan_manifest.json")),
+                os.path.join(data_dir, "index_manifest.json"),  # Old manifest format
+                os.path.join(data_dir, "audit.log"),  # Audit log
+                os.path.join(data_dir, ".salt"),  # Encryption salt
+                os.path.join(data_dir, "scanner.log"),  # Scanner logs
+                os.path.join(data_dir, "scanner_error.log"),
+            )
+            # One unlink per path; a missing file is just skipped, so there
+            # is no separate exists() check.
+            for path in candidates:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    continue
+                deleted_items.append(os.path.basename(path))
+            self._manifest_cache = None
             
-            # Delete encryption salt
-            salt_path = self.data_dir / ".salt"
-            if salt_path.exists():
-                salt_path.unlink()
-                deleted_items.append(".salt")
+            # Delete derived encryption keys, including Keychain copies
+            if KeyManager(self.data_dir).delete_derived_keys():
+                deleted_items.append("derived keys")
             
-            # Delete scanner logs
-            for log_file in ["scanner.log", "scanner_error.log"]:
-                log_path = self.data_dir / log_file
-                if log_path.exists():
-                    log_path.unlink()
-                    deleted_items.append(log_file)
+            # Delete cached image descriptions
+            image_cache = self.data_dir / "image_cache"
+            if image_cache.exists():
+                shutil.rmtree(image_cache)
+                deleted_items.append("image_cache")
             
             logger.info("Deleted all data: %s", ", ".join(deleted_items))
             print(f"✅ Deleted {len(deleted_items)} items: {', '.join(deleted_items)}")
@@ -447,12 +665,16 @@ class PrivacyManager:
         - How to delete it
         """
         stats = self.get_storage_stats()
-        files = self.list_indexed_files()
+        try:
+            files = self._load_manifest().get("files", {})
+        except Exception as e:
+            logger.error("Failed to read manifest for report: %s", e)
+            files = {}
         
         # Get unique directories being indexed
-        directories = set()
-        for f in files:
-            directories.add(str(Path(f["filepath"]).parent))
+        directories = {os.path.dirname(filepath) for filepath in files}
+        
+        recent_files = [f["filepath"] for f in self.list_indexed_files(limit=10)]
         
         return {
             "report_date": datetime.now().isoformat(),
@@ -469,7 +691,7 @@ class PrivacyManager:
                 "audit_log": str(self.data_dir / "audit.log"),
             },
             "source_directories": sorted(directories)[:20],  # Top 20
-            "recent_files": [f["filepath"] for f in files[:10]],
+            "recent_files": recent_files,
             "how_to_delete": {
                 "single_file": "privacy.delete_file_from_index(filepath)",
                 "all_vectors": "privacy.delete_index()",
@@ -504,12 +726,13 @@ def main():
     privacy = PrivacyManager()
     
     if args.list:
-        files = privacy.list_indexed_files()
-        print(f"\n📁 Indexed Files ({len(files)} total):\n")
-        for f in files[:50]:  # Show first 50
+        total = privacy.get_indexed_file_count()
+        files = privacy.list_indexed_files(limit=50)  # Show first 50
+        print(f"\n📁 Indexed Files ({total} total):\n")
+        for f in files:
             print(f"  • {f['filename']} ({f['chunk_count']} chunks)")
-        if len(files) > 50:
-            print(f"  ... and {len(files) - 50} more")
+        if total > 50:
+            print(f"  ... and {total - 50} more")
     
     elif args.stats:
         stats = privacy.get_storage_stats()
@@ -158,6 +158,31 @@ FILTER_PHRASES = [
     r"\bsince\s+\w+\b",
 ]
 
+# Compiled once at import; parse_query runs on every search. Queries are
+# matched both lowercased and in their original case, so all are
+# compiled case-insensitive.
+_FILE_TYPE_RES = [
+    (re.compile(pattern, re.IGNORECASE), extensions)
+    for pattern, extensions in FILE_TYPE_PATTERNS.items()
+]
+_RELATIVE_DATE_RES = [
+    (re.compile(pattern, re.IGNORECASE), date_func)
+    for pattern, date_func in RELATIVE_DATE_PATTERNS.items()
+]
+_MONTH_RE = re.compile(
+    r"\b(in|from|during)\s+(january|february|march|april|may|june|july|august|september|october|november|december)(?:\s+(\d{4}))?\b",
+    re.IGNORECASE,
+)
+_YEAR_RE = re.compile(r"\b(?:from|in)\s+(\d{4})\b", re.IGNORECASE)
+_DIR_RE = re.compile(
+    r"\b(?:in|from)\s+(?:my\s+)?(documents?|desktop|downloads?|pictures?)\b",
+    re.IGNORECASE,
+)
+_WS_RE = re.compile(r"\s+")
+_DANGLING_FILTER_RE = re.compile(
+    r"^\s*(from|in|modified|created|during|since)\s*$", re.IGNORECASE
+)
+
 
 def parse_query(query: str) -> QueryFilters:
     """
@@ -183,17 +208,17 @@ def parse_query(query: str) -> QueryFilters:
     directory: str | None = None
     
     # Extract file types
-    for pattern, extensions in FILE_TYPE_PATTERNS.items():
-        if re.search(pattern, query_lower):
+    for pattern, extensions in _FILE_TYPE_RES:
+        if pattern.search(query_lower):
             file_types.extend(extensions)
-            query = re.sub(pattern, "", query, flags=re.IGNORECASE)
+            query = pattern.sub("", query)
     
     # Remove duplicates
     file_types = list(set(file_types))
     
     # Extract relative dates
-    for pattern, date_func in RELATIVE_DATE_PATTERNS.items():
-        match = re.search(pattern, query_lower)
+    for pattern, date_func in _RELATIVE_DATE_RES:
+        match = pattern.search(query_lower)
         if match:
             if callable(date_func):
                 try:
@@ -212,12 +237,11 @@ def parse_query(query: str) -> QueryFilters:
                 except Exception:
                     pass
             
-            query = re.sub(pattern, "", query, flags=re.IGNORECASE)
+            query = pattern.sub("", query)
             break
     
     # Extract month names with optional year
-    month_pattern = r"\b(in|from|during)\s+(january|february|march|april|may|june|july|august|september|october|november|december)(?:\s+(\d{4}))?\b"
-    match = re.search(month_pattern, query_lower)
+    match = _MONTH_RE.search(query_lower)
     if match and not date_from:
         month_name = match.group(2)
         year = int(match.group(3)) if match.group(3) else datetime.now().year
@@ -230,20 +254,18 @@ def parse_query(query: str) -> QueryFilters:
         else:
             date_to = datetime(year, month + 1, 1)
         
-        query = re.sub(month_pattern, "", query, flags=re.IGNORECASE)
+        query = _MONTH_RE.sub("", query)
     
     # Extract year
-    year_pattern = r"\b(?:from|in)\s+(\d{4})\b"
-    match = re.search(year_pattern, query_lower)
+    match = _YEAR_RE.search(query_lower)
     if match and not date_from:
         year = int(match.group(1))
         date_from = datetime(year, 1, 1)
         date_to = datetime(year + 1, 1, 1)
-        query = re.sub(year_pattern, "", query, flags=re.IGNORECASE)
+        query = _YEAR_RE.sub("", query)
     
     # Extract directory patterns
-    dir_pattern = r"\b(?:in|from)\s+(?:my\s+)?(documents?|desktop|downloads?|pictures?)\b"
-    match = re.search(dir_pattern, query_lower)
+    match = _DIR_RE.search(query_lower)
     if match:
         folder = match.group(1).rstrip("s").capitalize()
         if folder == "Document":
@@ -253,13 +275,13 @@ def parse_query(query: str) -> QueryFilters:
         elif folder == "Picture":
             folder = "Pictures"
         directory = f"~/{folder}"
-        query = re.sub(dir_pattern, "", query, flags=re.IGNORECASE)
+        query = _DIR_RE.sub("", query)
     
     # Clean up the query
-    query = re.sub(r"\s+", " ", query).strip()
+    query = _WS_RE.sub(" ", query).strip()
     
     # Remove dangling filter words
-    query = re.sub(r"^\s*(from|in|modified|created|during|since)\s*$", "", query, flags=re.IGNORECASE)
+    query = _DANGLING_FILTER_RE.sub("", query)
     query = query.strip()
     
     return QueryFilters(
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from enum import Enum
 import re
+from typing import Iterable
 
 
 class QueryIntent(str, Enum):
@@ -12,7 +13,7 @@ class QueryIntent(str, Enum):
 
 
 # Terms that indicate factual personal questions requiring explicit evidence
-FACT_TERMS = {
+FACT_TERMS = frozenset({
     "salary",
     "compensation",
     "base",
@@ -34,18 +35,18 @@ FACT_TERMS = {
     "when",
     "how much",
     "how many",
-}
+})
 
-SUMMARY_TERMS = {
+SUMMARY_TERMS = frozenset({
     "summarize",
     "summary",
     "overview",
     "describe",
     "explain",
-}
+})
 
 # Terms that indicate exploratory/keyword search — skip answer generation
-FULLTEXT_TERMS = {
+FULLTEXT_TERMS = frozenset({
     "find",
     "search",
     "show",
@@ -54,7 +55,22 @@ FULLTEXT_TERMS = {
     "documents",
     "files",
     "related",
-}
+})
+
+
+def _terms_pattern(terms: Iterable[str]) -> re.Pattern[str]:
+    """Compile a whole-word alternation matching any of ``terms``."""
+    alternation = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b")
+
+
+_WORD_RE = re.compile(r"\w+")
+
+# Single words are checked against the query's token set in one C-level
+# set operation; multi-word phrases can never be a single \w+ token, so
+# they get their own whole-word pattern over the query text.
+_FACT_TOKENS = frozenset(t for t in FACT_TERMS if " " not in t)
+_FACT_PHRASE_RE = _terms_pattern(t for t in FACT_TERMS if " " in t)
 
 
 def classify_query(query: str) -> QueryIntent:
@@ -70,21 +86,21 @@ def classify_query(query: str) -> QueryIntent:
         return QueryIntent.FULLTEXT
 
     lowered = text.lower()
-    tokens = set(re.findall(r"\w+", lowered))
+    tokens = set(_WORD_RE.findall(lowered))
 
     # Check for summary intent
-    if any(term in tokens for term in SUMMARY_TERMS):
+    if not tokens.isdisjoint(SUMMARY_TERMS):
         return QueryIntent.SUMMARY
 
     # Check for exploratory/fulltext intent
-    if any(term in tokens for term in FULLTEXT_TERMS):
+    if not tokens.isdisjoint(FULLTEXT_TERMS):
         return QueryIntent.FULLTEXT
 
     # Check for factual question patterns
     if lowered.startswith(("who ", "where ", "when ", "what ", "how much", "how many")):
         return QueryIntent.FACT_LOOKUP
 
-    if any(term in tokens for term in FACT_TERMS):
+    if not tokens.isdisjoint(_FACT_TOKENS) or _FACT_PHRASE_RE.search(lowered):
         return QueryIntent.FACT_LOOKUP
 
     # Quoted phrases or short queries → key phrase lookup
@@ -18,50 +18,122 @@ from __future__ import annotations
 
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
-from typing import Iterable
+from functools import lru_cache
+from typing import Callable, Iterable
+
+import numpy as np
+
+# Optional: Aho-Corasick automaton matches all boilerplate terms in one pass
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 # LLM integration for intelligent extraction
 from app.llm import extract_answer_from_chunk as llm_extract, compress_answer as llm_compress, is_available as llm_available
 
 logger = logging.getLogger("rag")
 
+# Concurrent LLM extraction requests in propose_answers_for_chunks
+_LLM_MAX_WORKERS = 8
+
 
 # =============================================================================
 # TEXT UTILITIES
 # =============================================================================
 
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"\w+")
+_WS_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([,.;:!?])")
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\s+(\w)")
+_SPACED_LETTERS_RE = re.compile(r"\b(?:[A-Za-z]\s+){2,}[A-Za-z]\b")
+
+# Every ASCII character that \s matches, mapped to a plain space
+_ASCII_WS_TABLE = str.maketrans(dict.fromkeys("\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f", " "))
+
+
 def _sentences(text: str) -> Iterable[str]:
     """Split text into sentences."""
-    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+    for sentence in _SENTENCE_SPLIT_RE.split(text.strip()):
         if sentence:
             yield sentence
 
 
-def _tokenize(text: str) -> set[str]:
-    """Tokenize text into lowercase words (3+ chars)."""
-    return {t for t in re.findall(r"\w+", text.lower()) if len(t) > 2}
+@lru_cache(maxsize=4096)
+def _tokenize(text: str) -> frozenset[str]:
+    """
+    Tokenize text into lowercase words (3+ chars).
+    
+    Cached, since the same query and sentences are tokenized repeatedly
+    while scoring; the result is a frozenset so it can be shared safely.
+    """
+    return frozenset(t for t in _WORD_RE.findall(text.lower()) if len(t) > 2)
 
 
 def normalize_whitespace(text: str) -> str:
     """Normalize whitespace and punctuation spacing."""
-    text = text.replace("\n", " ")
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"\s+([,.;:!?])", r"\1", text)
+    if text.isascii():
+        # Table lookup plus halving double spaces (a handful of C-level
+        # passes, logarithmic in the longest run) beats the regex VM.
+        text = text.translate(_ASCII_WS_TABLE)
+        while "  " in text:
+            text = text.replace("  ", " ")
+    else:
+        text = _WS_RE.sub(" ", text)
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
     return text.strip()
 
 
+def _join_spaced_letters(match: re.Match[str]) -> str:
+    """Collapse a run like "S a l a r y" back into one word."""
+    return match.group(0).replace(" ", "")
+
+
 def fix_pdf_spacing(text: str) -> str:
     """Fix common PDF extraction artifacts."""
-    text = re.sub(r"(\w)-\s+(\w)", r"\1\2", text)
-    def _join_spaced_letters(match: re.Match[str]) -> str:
-        return match.group(0).replace(" ", "")
-    text = re.sub(r"\b(?:[A-Za-z]\s+){2,}[A-Za-z]\b", _join_spaced_letters, text)
-    text = re.sub(r"\s+([,.;:!?])", r"\1", text)
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    text = _SPACED_LETTERS_RE.sub(_join_spaced_letters, text)
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
     return text
 
 
+# One-pass equivalent of normalize_whitespace(fix_pdf_spacing(text)). The
+# alternatives, tried left to right at each position:
+#   1. hyphenated line break ("exam-  ple" -> "example")
+#   2. spaced-out letters ("S a l a r y" -> "Salary"); the lookahead keeps a
+#      run from swallowing the first half of a hyphen break, which the
+#      two-function pipeline would have joined first
+#   3. a whitespace run before punctuation, which is dropped
+#   4. any other whitespace run except a lone space (already normalized,
+#      so it is left unmatched and skips the Python callback)
+_CLEANUP_RE = re.compile(
+    r"(\w)-\s+(\w)"
+    r"|(\b(?:[A-Za-z]\s+){2,}[A-Za-z]\b)(?!-\s+\w)"
+    r"|\s+([,.;:!?])"
+    r"|\s{2,}|[^\S ]"
+)
+
+
+def _cleanup_replacement(match: re.Match[str]) -> str:
+    hyphen_left, spaced, punct = match.group(1, 3, 4)
+    if hyphen_left is not None:
+        return hyphen_left + match.group(2)
+    if spaced is not None:
+        # Only spaces join the letters; other whitespace collapses to one
+        return _WS_RE.sub(" ", spaced.replace(" ", ""))
+    return punct if punct is not None else " "
+
+
+def clean_text(text: str) -> str:
+    """Same result as normalize_whitespace(fix_pdf_spacing(text)), in one pass."""
+    return _CLEANUP_RE.sub(_cleanup_replacement, text).strip()
+
+
 # =============================================================================
 # DATA STRUCTURES
 # =============================================================================
@@ -87,7 +159,9 @@ class AnswerCandidate:
 # STAGE B: PER-CHUNK EXTRACTIVE ANSWER PROPOSAL (GPT-POWERED)
 # =============================================================================
 
-def propose_answer_from_chunk(query: str, chunk: dict) -> AnswerCandidate | None:
+def propose_answer_from_chunk(
+    query: str, chunk: dict, use_llm: bool | None = None
+) -> AnswerCandidate | None:
     """
     Extract the smallest text span from this chunk that answers the query.
     
@@ -96,14 +170,27 @@ def propose_answer_from_chunk(query: str, chunk: dict) -> AnswerCandidate | None
     - Finds answers even with different phrasing
     - Returns minimal answer spans
     
+    ``use_llm`` lets callers processing many chunks check LLM availability
+    once up front; when None it is checked here.
+    
     Returns None if the chunk does not contain a direct answer.
     """
-    text = normalize_whitespace(fix_pdf_spacing(chunk.get("text", "")))
+    raw = chunk.get("text", "")
+    # Cleanup only ever merges words, so a chunk with fewer than 5 words
+    # can be rejected before running the regex passes. maxsplit bounds the
+    # work to the first few words.
+    if not raw or len(raw.split(maxsplit=4)) < 5:
+        return None
+    
+    text = clean_text(raw)
     if not text or len(text.split()) < 5:
         return None
     
+    if use_llm is None:
+        use_llm = llm_available()
+    
     # Use LLM for extraction if available
-    if llm_available():
+    if use_llm:
         result = llm_extract(query, text)
         
         answer = result.get("answer", "NONE")
@@ -125,26 +212,64 @@ def propose_answer_from_chunk(query: str, chunk: dict) -> AnswerCandidate | None
     return _propose_answer_regex_fallback(query, chunk, text)
 
 
+def propose_answers_for_chunks(
+    query: str, chunks: list[dict], use_llm: bool | None = None
+) -> list[AnswerCandidate | None]:
+    """
+    Run propose_answer_from_chunk over many chunks.
+    
+    With the LLM available the per-chunk requests are issued from a
+    thread pool, so latency is about one round trip per batch of
+    workers instead of one per chunk. The regex fallback is CPU-bound
+    and runs inline.
+    
+    Returns:
+        One candidate (or None) per chunk, in input order.
+    """
+    if use_llm is None:
+        use_llm = llm_available()
+    
+    if not use_llm or len(chunks) < 2:
+        return [propose_answer_from_chunk(query, chunk, use_llm=use_llm) for chunk in chunks]
+    
+    workers = min(_LLM_MAX_WORKERS, len(chunks))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(
+            lambda chunk: propose_answer_from_chunk(query, chunk, use_llm=True),
+            chunks,
+        ))
+
+
 def _propose_answer_regex_fallback(query: str, chunk: dict, text: str) -> AnswerCandidate | None:
     """Fallback extraction using regex patterns (no LLM)."""
     query_terms = _tokenize(query)
     question_type = _infer_question_type(query)
     
-    best_span = None
+    best_sentence: _SentenceCtx | None = None
+    best_entity = None
     best_score = 0.0
     
-    for sentence in _sentences(text):
-        sentence = normalize_whitespace(fix_pdf_spacing(sentence))
-        if not sentence or _is_boilerplate(sentence):
+    for sentence_text in _sentences(text):
+        sentence_text = clean_text(sentence_text)
+        if not sentence_text or _is_boilerplate(sentence_text):
             continue
         
-        score = _score_sentence_for_extraction(sentence, query_terms, question_type)
+        # Split/tokenize and scan for the entity once, shared by scoring and span extraction
+        sentence = _SentenceCtx.from_text(sentence_text)
+        entity = _find_entity(sentence_text, question_type)
+        score = _score_sentence_for_extraction(sentence, query_terms, question_type, entity)
         
         if score > best_score:
             best_score = score
-            best_span = _extract_minimal_span(sentence, query_terms, question_type)
+            best_sentence = sentence
+            best_entity = entity
+    
+    if best_sentence is None or best_score < 0.15:
+        return None
     
-    if not best_span or best_score < 0.15:
+    # Only the winning sentence needs its span extracted
+    best_span = _extract_minimal_span(best_sentence, query_terms, question_type, best_entity)
+    if not best_span:
         return None
     
     return AnswerCandidate(
@@ -160,6 +285,18 @@ def _propose_answer_regex_fallback(query: str, chunk: dict, text: str) -> Answer
 # REGEX FALLBACK HELPERS
 # =============================================================================
 
+@dataclass
+class _SentenceCtx:
+    """A cleaned candidate sentence with its words and tokens, computed once."""
+    text: str
+    words: list[str]
+    tokens: frozenset[str]
+    
+    @classmethod
+    def from_text(cls, text: str) -> _SentenceCtx:
+        return cls(text=text, words=text.split(), tokens=_tokenize(text))
+
+
 NUMBER_PATTERN = re.compile(r"\$\s*\d[\d,]*(?:\.\d{2})?|\d[\d,]+(?:\.\d{2})?")
 DATE_PATTERN = re.compile(
     r"\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|"
@@ -172,80 +309,139 @@ ORG_PATTERN = re.compile(
     r"(?:\s+(?:Inc|LLC|Corp|Company|Co|Ltd|University|College|Hospital|Bank|Health))\.?)\b"
 )
 LOCATION_PATTERN = re.compile(r"\b(?:in|at|from|to)\s+([A-Z][a-z]+(?:,?\s+[A-Z][a-z]+)*)")
+# Maximal run of capitalized words, the only places an ORG_PATTERN match can sit
+_CAPITALIZED_RUN_RE = re.compile(r"\b[A-Z][A-Za-z&]*(?:\s+[A-Z][A-Za-z&]*)*")
+DIRECT_STATEMENT_PATTERN = re.compile(r"\b(is|are|was|were|will be)\s+(a|an|the|\$|\d)", re.I)
+COPULA_PATTERN = re.compile(r"\b(is|are|was|means|refers to)\b", re.I)
+
+
+def _search_org(text: str) -> re.Match[str] | None:
+    """
+    Equivalent of ``ORG_PATTERN.search(text)`` in linear time.
+    
+    A plain search retries ORG_PATTERN from every word of a long run of
+    capitalized words, which is quadratic in the run length. If the
+    attempt from the start of a run fails, every later start in it fails
+    too, so only the run start is tried before skipping past the run.
+    """
+    pos = 0
+    while True:
+        run = _CAPITALIZED_RUN_RE.search(text, pos)
+        if run is None:
+            return None
+        match = ORG_PATTERN.match(text, run.start())
+        if match:
+            return match
+        pos = run.end()
+
+
+@dataclass(frozen=True)
+class _EntityRule:
+    """How a question type finds, scores and frames its expected entity."""
+    searches: tuple[Callable[[str], re.Match[str] | None], ...]  # tried in order
+    bonus: float  # score bonus for containing the entity
+    context_words: int  # words kept on each side of the entity in the span
+
+
+# One lookup per question type; types without an entry ("what", "other") have no entity
+_ENTITY_RULES: dict[str, _EntityRule] = {
+    "how_much": _EntityRule((NUMBER_PATTERN.search,), 0.3, 6),
+    "how_many": _EntityRule((NUMBER_PATTERN.search,), 0.3, 6),
+    "when": _EntityRule((DATE_PATTERN.search,), 0.3, 5),
+    "who": _EntityRule((NAME_PATTERN.search, _search_org), 0.25, 5),
+    "where": _EntityRule((LOCATION_PATTERN.search,), 0.25, 5),
+}
 
 BOILERPLATE_TERMS = {
     "dear", "sincerely", "regards", "confidential", "page",
     "attached", "thank you", "congratulations", "hereby",
 }
+# Substring match of any term in one scan (same semantics as `term in text`);
+# searched on lowercased text, which beats compiling with re.I
+_BOILERPLATE_RE = re.compile("|".join(re.escape(t) for t in sorted(BOILERPLATE_TERMS)))
 
+if AHOCORASICK_AVAILABLE:
+    _BOILERPLATE_AC = ahocorasick.Automaton()
+    for _term in BOILERPLATE_TERMS:
+        _BOILERPLATE_AC.add_word(_term, _term)
+    _BOILERPLATE_AC.make_automaton()
 
-def _score_sentence_for_extraction(sentence: str, query_terms: set[str], question_type: str) -> float:
-    """Score how well a sentence answers the query."""
-    sentence_terms = _tokenize(sentence)
-    
+
+def _find_entity(sentence: str, question_type: str) -> re.Match[str] | None:
+    """First match of the entity the question type asks for, if any."""
+    rule = _ENTITY_RULES.get(question_type)
+    if rule is None:
+        return None
+    for search in rule.searches:
+        match = search(sentence)
+        if match:
+            return match
+    return None
+
+
+def _score_sentence_for_extraction(
+    sentence: _SentenceCtx,
+    query_terms: frozenset[str],
+    question_type: str,
+    entity: re.Match[str] | None,
+) -> float:
+    """Score how well a sentence answers the query (``entity`` from _find_entity)."""
     if query_terms:
-        overlap = len(query_terms & sentence_terms) / len(query_terms)
+        overlap = len(query_terms & sentence.tokens) / len(query_terms)
     else:
         overlap = 0.1
     
-    type_bonus = 0.0
-    if question_type in {"how_much", "how_many"} and NUMBER_PATTERN.search(sentence):
-        type_bonus = 0.3
-    elif question_type == "when" and DATE_PATTERN.search(sentence):
-        type_bonus = 0.3
-    elif question_type == "who" and (NAME_PATTERN.search(sentence) or ORG_PATTERN.search(sentence)):
-        type_bonus = 0.25
-    elif question_type == "where" and LOCATION_PATTERN.search(sentence):
-        type_bonus = 0.25
-    
-    word_count = len(sentence.split())
+    # An entity is only ever found for types that have a rule
+    type_bonus = _ENTITY_RULES[question_type].bonus if entity else 0.0
+    
+    word_count = len(sentence.words)
     length_bonus = 0.15 if 4 <= word_count <= 20 else 0.05
     
-    direct_bonus = 0.15 if re.search(r"\b(is|are|was|were|will be)\s+(a|an|the|\$|\d)", sentence, re.I) else 0.0
+    direct_bonus = 0.15 if DIRECT_STATEMENT_PATTERN.search(sentence.text) else 0.0
     
     return overlap * 0.5 + type_bonus + length_bonus + direct_bonus
 
 
-def _extract_minimal_span(sentence: str, query_terms: set[str], question_type: str) -> str:
+def _extract_minimal_span(
+    sentence: _SentenceCtx,
+    query_terms: frozenset[str],
+    question_type: str,
+    entity: re.Match[str] | None,
+) -> str:
     """Extract the smallest text span that answers the question."""
-    if question_type in {"how_much", "how_many"}:
-        match = NUMBER_PATTERN.search(sentence)
-        if match:
-            return _window_around_match(sentence, match, 6)
-    
-    if question_type == "when":
-        match = DATE_PATTERN.search(sentence)
-        if match:
-            return _window_around_match(sentence, match, 5)
-    
-    if question_type == "who":
-        match = NAME_PATTERN.search(sentence) or ORG_PATTERN.search(sentence)
-        if match:
-            return _window_around_match(sentence, match, 5)
-    
-    if question_type == "where":
-        match = LOCATION_PATTERN.search(sentence)
-        if match:
-            return _window_around_match(sentence, match, 5)
+    if entity:
+        return _window_around_match(sentence, entity, _ENTITY_RULES[question_type].context_words)
     
     if question_type == "what":
-        copula = re.search(r"\b(is|are|was|means|refers to)\b", sentence, re.I)
+        copula = COPULA_PATTERN.search(sentence.text)
         if copula:
-            tail = sentence[copula.end():].strip()
+            tail = sentence.text[copula.end():].strip()
             if tail:
                 return _shorten(tail, 18)
     
-    return sentence if len(sentence.split()) <= 25 else _extract_query_relevant_window(sentence, query_terms, 20)
+    if len(sentence.words) <= 25:
+        return sentence.text
+    return _extract_query_relevant_window(sentence, query_terms, 20)
 
 
-def _window_around_match(sentence: str, match: re.Match, context_words: int) -> str:
-    """Extract a window of words around a regex match."""
-    words = sentence.split()
+def _window_around_match(sentence: _SentenceCtx, match: re.Match, context_words: int) -> str:
+    """
+    Extract a window of words around a regex match.
+    
+    The sentence text must be single-space separated (as clean_text
+    returns), so words before the match can be counted from spaces
+    without slicing and splitting the prefix.
+    """
+    words = sentence.words
+    text = sentence.text
     if not words:
-        return sentence
+        return text
     
     start_char = match.start()
-    prefix_word_count = len(sentence[:start_char].split())
+    prefix_word_count = text.count(" ", 0, start_char)
+    if start_char and text[start_char - 1] != " ":
+        # Match starts mid-word; that partial word counts too
+        prefix_word_count += 1
     match_word_count = len(match.group().split())
     
     start_idx = max(0, prefix_word_count - context_words)
@@ -254,56 +450,87 @@ def _window_around_match(sentence: str, match: re.Match, context_words: int) ->
     return " ".join(words[start_idx:end_idx]).strip()
 
 
-def _extract_query_relevant_window(sentence: str, query_terms: set[str], window_size: int) -> str:
-    """Extract the most query-relevant window."""
-    words = sentence.split()
-    if len(words) <= window_size:
-        return sentence
-    
-    best_window = " ".join(words[:window_size])
-    best_score = 0.0
+def _extract_query_relevant_window(
+    sentence: _SentenceCtx, query_terms: frozenset[str], window_size: int
+) -> str:
+    """
+    Extract the window of ``window_size`` words covering the most distinct
+    query terms (the first such window on ties).
     
-    for i in range(len(words) - window_size + 1):
-        window = " ".join(words[i:i + window_size])
-        score = len(query_terms & _tokenize(window))
+    Each word is tokenized once and a count of query-term occurrences is
+    slid across the sentence, so only the winning window is joined.
+    """
+    words = sentence.words
+    if len(words) <= window_size:
+        return sentence.text
+    
+    # Query terms carried by each word (a word like "pay/bonus" may hold several).
+    # Query terms are already longer than two characters, so the intersection
+    # matches _tokenize without filling its cache with one entry per word.
+    word_terms = [query_terms.intersection(_WORD_RE.findall(word.lower())) for word in words]
+    
+    counts: dict[str, int] = {}
+    for terms in word_terms[:window_size]:
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+    score = len(counts)
+    
+    best_start = 0
+    best_score = score
+    for i in range(1, len(words) - window_size + 1):
+        for term in word_terms[i - 1]:
+            counts[term] -= 1
+            if not counts[term]:
+                del counts[term]
+        for term in word_terms[i + window_size - 1]:
+            counts[term] = counts.get(term, 0) + 1
+        score = len(counts)
         if score > best_score:
             best_score = score
-            best_window = window
+            best_start = i
     
-    return best_window
+    return " ".join(words[best_start:best_start + window_size])
 
 
 def _shorten(text: str, max_words: int = 20) -> str:
     """Shorten text to max words."""
-    words = text.split()
+    # maxsplit stops splitting once the limit is known to be exceeded
+    words = text.split(maxsplit=max_words)
     if len(words) <= max_words:
         return text.strip()
     return " ".join(words[:max_words]).strip().rstrip(".,;:") + "."
 
 
+@lru_cache(maxsize=4096)
 def _is_boilerplate(sentence: str) -> bool:
     """Check if sentence is boilerplate."""
-    return any(term in sentence.lower() for term in BOILERPLATE_TERMS)
+    lowered = sentence.lower()
+    if AHOCORASICK_AVAILABLE:
+        return next(_BOILERPLATE_AC.iter(lowered), None) is not None
+    return _BOILERPLATE_RE.search(lowered) is not None
+
+
+# Question-word prefixes (plain prefix test, like str.startswith) and the
+# question type each maps to
+_QUESTION_PREFIX_RE = re.compile(r"who|where|when|how much|how many|what")
+_QUESTION_PREFIX_TYPES = {
+    "who": "who", "where": "where", "when": "when",
+    "how much": "how_much", "how many": "how_many", "what": "what",
+}
+# Substring cues for queries without a question word, checked in this order
+_AMOUNT_CUE_RE = re.compile(r"salary|pay|cost|price|amount|compensation")
+_DATE_CUE_RE = re.compile(r"date|when|start|begin|effective")
 
 
 def _infer_question_type(query: str) -> str:
     """Infer the type of question."""
     lowered = query.strip().lower()
-    if lowered.startswith("who"):
-        return "who"
-    if lowered.startswith("where"):
-        return "where"
-    if lowered.startswith("when"):
-        return "when"
-    if lowered.startswith("how much"):
+    prefix = _QUESTION_PREFIX_RE.match(lowered)
+    if prefix:
+        return _QUESTION_PREFIX_TYPES[prefix.group()]
+    if _AMOUNT_CUE_RE.search(lowered):
         return "how_much"
-    if lowered.startswith("how many"):
-        return "how_many"
-    if lowered.startswith("what"):
-        return "what"
-    if any(w in lowered for w in ["salary", "pay", "cost", "price", "amount", "compensation"]):
-        return "how_much"
-    if any(w in lowered for w in ["date", "when", "start", "begin", "effective"]):
+    if _DATE_CUE_RE.search(lowered):
         return "when"
     return "other"
 
@@ -313,63 +540,85 @@ def _infer_question_type(query: str) -> str:
 # =============================================================================
 
 def select_best_answer(candidates: list[AnswerCandidate], query: str) -> AnswerCandidate | None:
-    """Select the single best answer from candidates."""
+    """
+    Select the single best answer from candidates.
+    
+    Features are gathered per candidate, then combined into scores in one
+    vectorized expression; argmax picks the first top scorer, which is the
+    candidate a stable sort would have put first.
+    """
     if not candidates:
         return None
     
     query_terms = _tokenize(query)
-    scored: list[tuple[float, AnswerCandidate]] = []
-    
-    for candidate in candidates:
-        score = candidate.confidence * 0.6
-        
-        answer_terms = _tokenize(candidate.answer)
-        if query_terms:
-            overlap = len(query_terms & answer_terms) / len(query_terms)
-            score += overlap * 0.25
-        
-        word_count = len(candidate.answer.split())
-        if 3 <= word_count <= 18:
-            score += 0.1
-        elif word_count > 30:
-            score -= 0.1
-        
-        if _is_generic_answer(candidate.answer):
-            score -= 0.15
-        
-        scored.append((score, candidate))
+    n = len(candidates)
+    # Lowered once, shared by the generic-phrase check and tokenization
+    lowered = [c.answer.lower() for c in candidates]
+    
+    confidence = np.fromiter((c.confidence for c in candidates), dtype=np.float64, count=n)
+    word_count = np.fromiter((len(c.answer.split()) for c in candidates), dtype=np.int64, count=n)
+    generic = np.fromiter(
+        (_GENERIC_ANSWER_RE.search(text) is not None for text in lowered), dtype=bool, count=n
+    )
+    if query_terms:
+        overlap = np.fromiter(
+            (len(query_terms & _tokenize(text)) for text in lowered), dtype=np.float64, count=n
+        ) / len(query_terms)
+    else:
+        overlap = np.zeros(n)
     
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return scored[0][1]
+    length_adjust = np.where(
+        (word_count >= 3) & (word_count <= 18), 0.1, np.where(word_count > 30, -0.1, 0.0)
+    )
+    scores = confidence * 0.6 + overlap * 0.25 + length_adjust - generic * 0.15
+    return candidates[int(scores.argmax())]
+
+
+GENERIC_ANSWER_TERMS = (
+    "the document", "this document", "the text", "information about", "details about",
+)
+# Matched against lowercased text: lower() + a case-sensitive scan is
+# several times faster than the same alternation compiled with re.I
+_GENERIC_ANSWER_RE = re.compile("|".join(re.escape(t) for t in GENERIC_ANSWER_TERMS))
 
 
 def _is_generic_answer(answer: str) -> bool:
     """Check if answer is too generic."""
-    generic = ["the document", "this document", "the text", "information about", "details about"]
-    return any(p in answer.lower() for p in generic)
+    return _GENERIC_ANSWER_RE.search(answer.lower()) is not None
 
 
 # =============================================================================
 # STAGE D: OPTIONAL COMPRESSION (GPT-POWERED)
 # =============================================================================
 
-def compress_answer_if_needed(answer: str, max_words: int = 25) -> str:
-    """Compress answer using LLM if too long."""
+def compress_answer_if_needed(
+    answer: str, max_words: int = 25, use_llm: bool | None = None
+) -> str:
+    """
+    Compress answer using LLM if too long.
+    
+    ``use_llm`` takes an availability result the caller already has; when
+    None it is checked here, and only if the answer is actually too long.
+    """
     if not answer:
         return answer
     
-    answer = normalize_whitespace(fix_pdf_spacing(answer))
+    answer = clean_text(answer)
     
-    if len(answer.split()) <= max_words:
+    # Split at most max_words times: enough to tell whether the answer is
+    # too long and to truncate it, without materializing every word
+    words = answer.split(maxsplit=max_words)
+    if len(words) <= max_words:
         return answer
     
     # Use LLM for intelligent compression
-    if llm_available():
+    if use_llm is None:
+        use_llm = llm_available()
+    if use_llm:
         return llm_compress(answer)
     
     # Fallback: truncate
-    words = answer.split()[:max_words]
-    return " ".join(words).rstrip(".,;:") + "."
+    return " ".join(words[:max_words]).rstrip(".,;:") + "."
 
 
 # =============================================================================
@@ -390,9 +639,9 @@ def extract_best_answer(query: str, chunks: list[dict]) -> dict:
         return _abstain_response("No documents found.")
     
     # Stage B: Per-chunk extraction
+    use_llm = llm_available()
     candidates: list[AnswerCandidate] = []
-    for chunk in chunks:
-        candidate = propose_answer_from_chunk(query, chunk)
+    for candidate in propose_answers_for_chunks(query, chunks, use_llm=use_llm):
         if candidate:
             candidates.append(candidate)
             logger.debug(
@@ -414,7 +663,7 @@ def extract_best_answer(query: str, chunks: list[dict]) -> dict:
         )
     
     # Stage D: Compress if needed
-    final_answer = compress_answer_if_needed(best.answer)
+    final_answer = compress_answer_if_needed(best.answer, use_llm=use_llm)
     confidence_level = _confidence_level_from_score(best.confidence)
     
     logger.debug("Final answer (%s): %s", confidence_level.value, final_answer)
@@ -54,5 +54,8 @@ class ResearchStore:
     def search(self, query_embedding: np.ndarray, k: int = 5) -> list[dict[str, Any]]:
         return self.store.search(query_embedding, k=k)
 
+    def search_batch(self, query_embeddings: np.ndarray, k: int = 5) -> list[list[dict[str, Any]]]:
+        return self.store.search_batch(query_embeddings, k=k)
+
     def save(self) -> None:
         self.store.save(self.path)
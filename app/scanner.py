@@ -9,6 +9,9 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -16,13 +19,35 @@ from typing import Generator, Iterator
 
 from app.config import DATA_DIR, ensure_data_dir
 from app.ingestion import IMAGE_EXTENSIONS, SUPPORTED_EXTENSIONS
+from app.manifest_io import manifest_lock, write_manifest
 from app.scanner_config import ScannerConfig, get_config
 
+# Optional: BLAKE3 has SIMD kernels and is much faster than MD5 for file hashing
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# Optional: orjson parses and writes large manifests several times faster
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger("rag.scanner")
 
 # Manifest file for tracking scanned files
 SCAN_MANIFEST_PATH = DATA_DIR / "scan_manifest.json"
 
+# Threads listing directories concurrently during a scan
+_SCAN_WORKERS = 8
+
+# Files larger than this are hashed with a bigger buffer (and threads with BLAKE3)
+_LARGE_HASH_THRESHOLD = 1024 * 1024
+_LARGE_HASH_BUFFER_SIZE = 1024 * 1024
+
 
 @dataclass
 class ScannedFile:
@@ -52,94 +77,129 @@ class ScanManifest:
         """Load manifest from disk."""
         if self.manifest_path.exists():
             try:
-                with open(self.manifest_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.files = data.get("files", {})
-                    self.last_full_scan = data.get("last_full_scan")
+                raw = self.manifest_path.read_bytes()
+                data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+                self.files = data.get("files", {})
+                self.last_full_scan = data.get("last_full_scan")
             except Exception as e:
                 logger.warning("Failed to load scan manifest: %s", e)
                 self.files = {}
     
     def save(self) -> None:
-        """Save manifest to disk."""
+        """
+        Save manifest to disk.
+        
+        Takes the manifest lock and replaces the file atomically, so it
+        can't interleave with PrivacyManager.delete_files_from_index or
+        leave a partial file. It still writes this instance's view, so
+        deletions made after it was loaded are overwritten.
+        """
         ensure_data_dir()
+        data = {
+            "files": self.files,
+            "last_full_scan": self.last_full_scan,
+        }
         try:
-            with open(self.manifest_path, "w", encoding="utf-8") as f:
-                json.dump({
-                    "files": self.files,
-                    "last_full_scan": self.last_full_scan,
-                }, f, indent=2)
+            if ORJSON_AVAILABLE:
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(data, indent=2).encode("utf-8")
+            with manifest_lock(self.manifest_path):
+                write_manifest(self.manifest_path, payload)
         except Exception as e:
             logger.error("Failed to save scan manifest: %s", e)
     
     @staticmethod
-    def compute_file_hash(file_path: Path) -> str:
-        """Compute MD5 hash of file contents."""
-        hasher = hashlib.md5()
+    def compute_file_hash(file_path: str | Path) -> str:
+        """
+        Compute a content hash of the file.
+        
+        Uses BLAKE3 when installed, otherwise 128-bit BLAKE2b. The hash is
+        only compared for equality, so switching algorithms just triggers
+        one re-hash per file. Files over 1 MiB are read in 1 MiB blocks into
+        a reused buffer (multithreaded with BLAKE3). Plain reads are used
+        rather than mmap, which would crash on a file truncated mid-hash.
+        """
         try:
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(65536), b""):
-                    hasher.update(chunk)
+                large = os.fstat(f.fileno()).st_size > _LARGE_HASH_THRESHOLD
+                if BLAKE3_AVAILABLE:
+                    hasher = blake3.blake3(
+                        max_threads=blake3.blake3.AUTO if large else 1
+                    )
+                else:
+                    hasher = hashlib.blake2b(digest_size=16)
+                
+                buf = bytearray(_LARGE_HASH_BUFFER_SIZE if large else 65536)
+                view = memoryview(buf)
+                while n := f.readinto(buf):
+                    hasher.update(view[:n])
             return hasher.hexdigest()
         except Exception:
             return ""
     
-    def get_file_state(self, file_path: Path) -> dict | None:
+    def get_file_state(self, file_path: str | Path) -> dict | None:
         """Get stored state for a file."""
-        return self.files.get(str(file_path))
+        return self.files.get(os.fspath(file_path))
     
-    def needs_indexing(self, file_path: Path) -> bool:
+    def needs_indexing(self, file_path: str | Path) -> bool:
         """
         Check if a file needs to be (re)indexed.
         
+        Decided from stat data alone; file contents are never read here.
         Returns True if:
         - File is not in manifest (new file)
+        - File size or inode has changed
         - File modification time has changed
-        - File hash has changed (if mtime changed)
         """
-        key = str(file_path)
+        key = os.fspath(file_path)
         
-        if key not in self.files:
+        stored = self.files.get(key)
+        if stored is None:
             return True
         
         try:
-            stat = file_path.stat()
-            stored = self.files[key]
-            
-            # Quick check: modification time
-            if stat.st_mtime != stored.get("mtime"):
-                # Verify with hash to avoid false positives from touched files
-                current_hash = self.compute_file_hash(file_path)
-                return current_hash != stored.get("hash")
-            
-            return False
+            stat = os.stat(key)
         except OSError:
             return False
+        
+        if stat.st_size != stored.get("size"):
+            return True
+        # Entries written before inodes were recorded have no "ino"
+        stored_ino = stored.get("ino")
+        if stored_ino is not None and stat.st_ino != stored_ino:
+            return True
+        return stat.st_mtime != stored.get("mtime")
     
     def mark_indexed(
         self,
-        file_path: Path,
+        file_path: str | Path,
         chunk_count: int,
         file_hash: str | None = None
     ) -> None:
-        """Mark a file as successfully indexed."""
+        """
+        Mark a file as successfully indexed.
+        
+        Pass ``file_hash`` if the caller already hashed the file so its
+        contents are not read a second time.
+        """
+        key = os.fspath(file_path)
         try:
-            stat = file_path.stat()
-            self.files[str(file_path)] = {
-                "hash": file_hash or self.compute_file_hash(file_path),
+            stat = os.stat(key)
+            self.files[key] = {
+                "hash": file_hash or self.compute_file_hash(key),
                 "mtime": stat.st_mtime,
                 "size": stat.st_size,
+                "ino": stat.st_ino,
                 "indexed_at": datetime.now().isoformat(),
                 "chunk_count": chunk_count,
             }
         except OSError as e:
             logger.warning("Failed to mark file as indexed: %s", e)
     
-    def mark_deleted(self, file_path: Path) -> None:
+    def mark_deleted(self, file_path: str | Path) -> None:
         """Remove a file from the manifest."""
-        key = str(file_path)
-        if key in self.files:
-            del self.files[key]
+        self.files.pop(os.fspath(file_path), None)
     
     def mark_full_scan_complete(self) -> None:
         """Record that a full scan was completed."""
@@ -203,86 +263,139 @@ class FileScanner:
         directory: Path,
         depth: int
     ) -> Generator[ScannedFile, None, None]:
-        """Recursively scan a directory for files."""
-        # Check depth limit
-        if self.config.max_depth > 0 and depth > self.config.max_depth:
-            return
+        """
+        Scan a directory tree for files.
         
-        # Check if directory is excluded
-        if self.config.is_directory_excluded(directory):
-            logger.debug("Skipping excluded directory: %s", directory)
+        Directory listings are fetched by a small thread pool so the
+        scandir syscalls of sibling directories overlap; files are checked
+        and yielded on the calling thread.
+        """
+        if not self._should_enter(directory, depth):
             return
         
+        executor = ThreadPoolExecutor(max_workers=_SCAN_WORKERS)
         try:
-            entries = list(directory.iterdir())
-        except PermissionError:
-            logger.debug("Permission denied: %s", directory)
-            return
-        except OSError as e:
-            logger.debug("Cannot read directory %s: %s", directory, e)
-            return
-        
-        for entry in entries:
-            try:
-                # Handle symlinks
-                if entry.is_symlink():
-                    if not self.config.follow_symlinks:
+            pending = deque([(executor.submit(_list_directory, directory), depth)])
+            while pending:
+                future, dir_depth = pending.popleft()
+                for entry in future.result():
+                    try:
+                        child_dir, scanned = self._classify_entry(entry)
+                    except OSError:
                         continue
-                    entry = entry.resolve()
-                
-                if entry.is_dir():
-                    if self.config.recursive:
-                        yield from self._scan_directory(entry, depth + 1)
-                
-                elif entry.is_file():
-                    scanned = self._check_file(entry)
+                    
                     if scanned:
                         yield scanned
-            
-            except PermissionError:
-                continue
-            except OSError:
-                continue
+                    elif (
+                        child_dir is not None
+                        and self.config.recursive
+                        and self._should_enter(child_dir, dir_depth + 1)
+                    ):
+                        pending.append((
+                            executor.submit(_list_directory, os.fspath(child_dir)),
+                            dir_depth + 1,
+                        ))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def _check_file(self, file_path: Path) -> ScannedFile | None:
+    def _should_enter(self, directory: Path | os.DirEntry, depth: int) -> bool:
+        """Check depth limit and exclusions before listing a directory."""
+        if self.config.max_depth > 0 and depth > self.config.max_depth:
+            return False
+        
+        # DirEntry is path-like: checked by its path string, no Path built
+        if self.config.is_directory_excluded(directory):
+            logger.debug("Skipping excluded directory: %s", os.fspath(directory))
+            return False
+        
+        return True
+    
+    def _classify_entry(
+        self,
+        entry: os.DirEntry
+    ) -> tuple[Path | os.DirEntry | None, ScannedFile | None]:
+        """
+        Sort a directory entry into a subdirectory or a scanned file.
+        
+        Returns (subdirectory, None) for directories, (None, ScannedFile)
+        for indexable files and (None, None) for anything skipped. Plain
+        subdirectories come back as their DirEntry, so no Path is built.
+        """
+        # Handle symlinks (resolved targets need fresh stat calls)
+        if entry.is_symlink():
+            if not self.config.follow_symlinks:
+                return None, None
+            target = Path(entry.path).resolve()
+            if target.is_dir():
+                return target, None
+            if target.is_file():
+                return None, self._check_file(target)
+            return None, None
+        
+        # d_type from the listing answers these without a stat call
+        if entry.is_dir(follow_symlinks=False):
+            return entry, None
+        if entry.is_file(follow_symlinks=False):
+            return None, self._check_file(entry)
+        return None, None
+    
+    def _check_file(self, file: Path | os.DirEntry) -> ScannedFile | None:
         """
         Check if a file should be indexed.
         
+        Args:
+            file: Path to the file, or the DirEntry from the scan. For a
+                DirEntry the extension is checked on its name string before
+                any Path is built, and its cached stat result is reused.
+        
         Returns ScannedFile if valid, None if excluded.
         """
-        # Check extension
-        suffix = file_path.suffix.lower()
+        entry = file if isinstance(file, os.DirEntry) else None
+        name = file.name
+        path_str = os.fspath(file)
+        
+        # Check extension (same rule as Path.suffix: ".env" has none)
+        stem, dot, ext = name.rpartition(".")
+        if not (dot and stem and ext):
+            return None
+        suffix = "." + ext.lower()
         if suffix not in SUPPORTED_EXTENSIONS:
             return None
         
         # Check exclusion patterns
-        if self.config.is_file_excluded(file_path):
-            logger.debug("Skipping excluded file: %s", file_path.name)
+        if self.config.is_file_excluded(path_str):
+            logger.debug("Skipping excluded file: %s", name)
+            return None
+        
+        # One stat (the DirEntry's, when scanning) serves every remaining check
+        try:
+            stat_result = entry.stat() if entry is not None else None
+        except OSError:
+            return None
+        probe = self.config.probe(path_str, stat_result)
+        if probe is None:
             return None
         
         # Check file size
-        if not self.config.is_file_size_valid(file_path):
-            logger.debug("Skipping file (size out of range): %s", file_path.name)
+        if not self.config.is_file_size_valid(probe):
+            logger.debug("Skipping file (size out of range): %s", name)
             return None
         
         # Determine if it's an image
         is_image = suffix in IMAGE_EXTENSIONS
         
         # For images, check additional restrictions
-        if is_image and not self.config.should_process_image(file_path):
-            logger.debug("Skipping image (not in allowed dirs or too large): %s", file_path.name)
+        if is_image and not self.config.should_process_image(probe):
+            logger.debug("Skipping image (not in allowed dirs or too large): %s", name)
             return None
         
-        try:
-            stat = file_path.stat()
-            return ScannedFile(
-                path=file_path,
-                size_bytes=stat.st_size,
-                modified_time=stat.st_mtime,
-                is_image=is_image,
-            )
-        except OSError:
-            return None
+        # Path is only built for files that pass every check
+        return ScannedFile(
+            path=Path(path_str) if entry is not None else file,
+            size_bytes=probe.size,
+            modified_time=probe.mtime,
+            is_image=is_image,
+        )
     
     def get_all_current_files(self) -> set[str]:
         """Get set of all currently scannable file paths."""
@@ -328,3 +441,15 @@ def scan_for_new_files(config: ScannerConfig | None = None) -> Iterator[ScannedF
     """
     scanner = FileScanner(config)
     yield from scanner.scan_for_changes()
+
+
+def _list_directory(directory: Path) -> list[os.DirEntry]:
+    """List a directory with scandir, returning [] if it can't be read."""
+    try:
+        with os.scandir(directory) as it:
+            return list(it)
+    except PermissionError:
+        logger.debug("Permission denied: %s", directory)
+    except OSError as e:
+        logger.debug("Cannot read directory %s: %s", directory, e)
+    return []
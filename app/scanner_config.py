@@ -7,19 +7,43 @@ Provides security checks and path resolution.
 from __future__ import annotations
 
 import fnmatch
+import json
 import logging
 import os
+import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+# LibYAML's C parser when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Optional: Aho-Corasick automaton tests all substring patterns in one pass
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 logger = logging.getLogger("rag.scanner")
 
 # Default config path
 CONFIG_PATH = Path(__file__).resolve().parents[1] / "scanner_config.yaml"
 
+# Per-config bound on cached exclusion results (paths per check type)
+_EXCLUSION_CACHE_SIZE = 8192
+
+
+@dataclass
+class FileProbe:
+    """Stat data for one file, gathered once and shared by the file checks."""
+    path: str | os.PathLike[str]
+    size: int
+    mtime: float
+
 
 @dataclass
 class ScannerConfig:
@@ -70,6 +94,61 @@ class ScannerConfig:
             self.excluded_directories = self._default_excluded_dirs()
         if not self.excluded_file_patterns:
             self.excluded_file_patterns = self._default_excluded_patterns()
+        self.compile_exclusions()
+        
+        # Image directories resolved once; should_process_image compares
+        # path strings against these instead of resolving both sides per call
+        self._image_dir_prefixes = tuple(
+            _dir_prefix(os.path.realpath(d)) for d in self.image_scan_directories
+        )
+        self._real_directory = lru_cache(maxsize=_EXCLUSION_CACHE_SIZE)(os.path.realpath)
+    
+    def compile_exclusions(self) -> None:
+        """
+        Compile the exclusion globs into regexes.
+        
+        fnmatch translates a glob to a regex on every call; here each list
+        is translated once. Most patterns are plain names (".env"),
+        suffixes ("*.pem") or substrings ("*token*"); those become set
+        lookups, str.endswith and ``in`` tests. The rest are joined into a
+        single alternation per check, so a path is tested with one regex
+        match instead of one fnmatch per pattern. Results are cached per
+        path string, since a scan re-checks the same directories. Runs at
+        construction; call again after changing excluded_directories or
+        excluded_file_patterns (this also drops the cached results).
+        """
+        # Directories: "X" and "**/X" for a bucketable X only ever match via
+        # a path component, so they skip the full-path regex
+        dir_simple = []
+        dir_complex = []
+        for pattern in (os.path.normcase(p) for p in self.excluded_directories):
+            stripped = pattern.replace("**/", "")
+            if pattern in (stripped, "**/" + stripped) and _is_bucketable(stripped):
+                dir_simple.append(stripped)
+            else:
+                dir_complex.append(pattern)
+        self._dir_literals, self._dir_suffixes, self._dir_substrings, _ = _bucket_globs(dir_simple)
+        self._dir_substring_ac = _build_automaton(self._dir_substrings)
+        self._dir_path_re = _compile_globs(dir_complex)
+        self._dir_part_re = _compile_globs(p.replace("**/", "") for p in dir_complex)
+        
+        # Files: a bucketable pattern matches the name exactly when its
+        # "**/" full-path form matches the path
+        file_patterns = [os.path.normcase(p.lower()) for p in self.excluded_file_patterns]
+        (self._file_literals, self._file_suffixes,
+         self._file_substrings, file_complex) = _bucket_globs(file_patterns)
+        self._file_substring_ac = _build_automaton(self._file_substrings)
+        self._file_name_re = _compile_globs(file_complex)
+        self._file_path_re = _compile_globs(f"**/{p}" for p in file_complex)
+        
+        self._dir_excluded = lru_cache(maxsize=_EXCLUSION_CACHE_SIZE)(self._match_directory)
+        self._file_excluded = lru_cache(maxsize=_EXCLUSION_CACHE_SIZE)(self._match_file)
+    
+    def clear_caches(self) -> None:
+        """Drop cached exclusion results and resolved directories."""
+        self._dir_excluded.cache_clear()
+        self._file_excluded.cache_clear()
+        self._real_directory.cache_clear()
     
     @staticmethod
     def _default_excluded_dirs() -> list[str]:
@@ -126,50 +205,101 @@ class ScannerConfig:
             "*.so", "*.dylib",
         ]
     
-    def is_directory_excluded(self, dir_path: Path) -> bool:
-        """Check if a directory should be excluded from scanning."""
-        dir_str = str(dir_path)
-        dir_name = dir_path.name
+    def is_directory_excluded(self, dir_path: str | os.PathLike[str]) -> bool:
+        """
+        Check if a directory should be excluded from scanning.
         
-        for pattern in self.excluded_directories:
-            # Check if pattern matches the full path or just the directory name
-            if fnmatch.fnmatch(dir_str, pattern):
-                return True
-            if fnmatch.fnmatch(dir_name, pattern.replace("**/", "")):
-                return True
-            # Check each component of the path
-            for part in dir_path.parts:
-                if fnmatch.fnmatch(part, pattern.replace("**/", "")):
-                    return True
+        Accepts a str, Path or os.DirEntry; only the path string is used,
+        so the scanner can pass scandir entries without building a Path.
+        """
+        return self._dir_excluded(os.fspath(dir_path))
+    
+    def is_file_excluded(self, file_path: str | os.PathLike[str]) -> bool:
+        """Check if a file should be excluded from indexing (str, Path or os.DirEntry)."""
+        return self._file_excluded(os.fspath(file_path))
+    
+    def _match_directory(self, dir_str: str) -> bool:
+        """Uncached directory exclusion check on a path string."""
+        normcase = os.path.normcase
+        
+        # Check if a pattern matches the full path
+        if self._dir_path_re is not None and self._dir_path_re.match(normcase(dir_str)):
+            return True
         
-        return False
+        # Check the directory name and each component of the path
+        parts, name = _path_parts(dir_str)
+        names = [normcase(part) for part in parts]
+        names.append(normcase(name))
+        
+        if not self._dir_literals.isdisjoint(names):
+            return True
+        if self._dir_suffixes and any(name.endswith(self._dir_suffixes) for name in names):
+            return True
+        # NUL never occurs in a pattern, so matches cannot span two names
+        if self._dir_substrings and _contains_any(
+            self._dir_substring_ac, self._dir_substrings, "\0".join(names)
+        ):
+            return True
+        part_re = self._dir_part_re
+        return part_re is not None and any(part_re.match(name) for name in names)
     
-    def is_file_excluded(self, file_path: Path) -> bool:
-        """Check if a file should be excluded from indexing."""
-        filename = file_path.name
-        file_str = str(file_path).lower()
+    def _match_file(self, file_str: str) -> bool:
+        """Uncached file exclusion check on a path string."""
+        normcase = os.path.normcase
+        name = normcase(os.path.basename(file_str).lower())
+        path = normcase(file_str.lower())
         
-        for pattern in self.excluded_file_patterns:
-            pattern_lower = pattern.lower()
-            # Match against filename
-            if fnmatch.fnmatch(filename.lower(), pattern_lower):
-                return True
-            # Match against full path for patterns with path separators
-            if fnmatch.fnmatch(file_str, f"**/{pattern_lower}"):
+        if name in self._file_literals:
+            return True
+        if self._file_suffixes and name.endswith(self._file_suffixes):
+            return True
+        if self._file_substrings:
+            # "**/*X*" matches when X occurs after the first separator
+            start = path.find(os.sep) + 1
+            if _contains_any(self._file_substring_ac, self._file_substrings, path, start):
                 return True
         
-        return False
+        # Match against filename
+        if self._file_name_re is not None and self._file_name_re.match(name):
+            return True
+        # Match against full path for patterns with path separators
+        return self._file_path_re is not None and self._file_path_re.match(path) is not None
+    
+    @staticmethod
+    def probe(
+        file_path: str | os.PathLike[str],
+        stat_result: os.stat_result | None = None,
+    ) -> FileProbe | None:
+        """
+        Stat a file once for the size and image checks.
+        
+        Args:
+            file_path: File to probe.
+            stat_result: Stat data the caller already has (e.g. from
+                DirEntry.stat()), used instead of a new stat call.
+        
+        Returns:
+            FileProbe, or None if the file can't be stat'ed.
+        """
+        if stat_result is None:
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                return None
+        return FileProbe(path=file_path, size=stat_result.st_size, mtime=stat_result.st_mtime)
     
-    def is_file_size_valid(self, file_path: Path) -> bool:
+    def _as_probe(self, file: str | os.PathLike[str] | FileProbe) -> FileProbe | None:
+        return file if isinstance(file, FileProbe) else self.probe(file)
+    
+    def is_file_size_valid(self, file: str | os.PathLike[str] | FileProbe) -> bool:
         """Check if file size is within allowed limits."""
-        try:
-            size = file_path.stat().st_size
-            max_bytes = self.max_file_size_mb * 1024 * 1024
-            return self.min_file_size_bytes <= size <= max_bytes
-        except OSError:
+        probe = self._as_probe(file)
+        if probe is None:
             return False
+        max_bytes = self.max_file_size_mb * 1024 * 1024
+        return self.min_file_size_bytes <= probe.size <= max_bytes
     
-    def should_process_image(self, file_path: Path) -> bool:
+    def should_process_image(self, file: str | os.PathLike[str] | FileProbe) -> bool:
         """Check if an image file should be processed with vision API."""
         if not self.process_images:
             return False
@@ -179,64 +309,70 @@ class ScannerConfig:
             return False
         
         # Check file size
-        try:
-            size_mb = file_path.stat().st_size / (1024 * 1024)
-            if size_mb > self.max_image_size_mb:
-                return False
-        except OSError:
+        probe = self._as_probe(file)
+        if probe is None:
+            return False
+        if probe.size / (1024 * 1024) > self.max_image_size_mb:
             return False
         
         # Check if in allowed image directories
-        if self.image_scan_directories:
-            in_allowed = any(
-                self._is_subpath(file_path, img_dir)
-                for img_dir in self.image_scan_directories
-            )
-            if not in_allowed:
-                return False
+        if self.image_scan_directories and not self._in_image_directories(probe.path):
+            return False
         
         # Check image dimensions (skip small icons)
-        if not self.is_image_large_enough(file_path):
+        if not self.is_image_large_enough(probe):
             return False
         
         return True
     
-    def is_image_large_enough(self, file_path: Path) -> bool:
+    def is_image_large_enough(self, file: str | os.PathLike[str] | FileProbe) -> bool:
         """
         Check if image meets minimum dimension requirements.
         
         Skips small icons, thumbnails, and UI elements.
-        Uses PIL for fast dimension reading without loading full image.
+        PNG, GIF, WebP and JPEG sizes are read straight from the file
+        header; other formats go through PIL, which is imported on first use.
         """
+        file_path = file.path if isinstance(file, FileProbe) else file
         try:
-            from PIL import Image
-            
-            with Image.open(file_path) as img:
-                width, height = img.size
-                return (
-                    width >= self.min_image_width and 
-                    height >= self.min_image_height
-                )
-        except ImportError:
-            # PIL not installed, fall back to file size heuristic
-            # Icons are typically < 50KB
-            try:
-                size = file_path.stat().st_size
-                return size > 50 * 1024  # > 50KB probably not an icon
-            except OSError:
-                return False
+            size = _read_image_header_size(file_path)
+            if size is None:
+                image_module = _pil_image()
+                if image_module is None:
+                    # PIL not installed, fall back to file size heuristic
+                    # Icons are typically < 50KB
+                    probe = self._as_probe(file)
+                    if probe is None:
+                        return False
+                    return probe.size > 50 * 1024  # > 50KB probably not an icon
+                with image_module.open(file_path) as img:
+                    size = img.size
         except Exception:
             # Can't read image, skip it
             return False
+        
+        width, height = size
+        return width >= self.min_image_width and height >= self.min_image_height
     
-    @staticmethod
-    def _is_subpath(path: Path, parent: Path) -> bool:
-        """Check if path is under parent directory."""
-        try:
-            path.resolve().relative_to(parent.resolve())
+    def _in_image_directories(self, path: str | os.PathLike[str]) -> bool:
+        """
+        Check if the resolved path is under one of image_scan_directories.
+        
+        Without follow_symlinks the scanner never yields symlinks, so only
+        the parent directory is resolved (cached) when the plain string
+        check misses, e.g. for a scan root spelled through a symlink.
+        """
+        path_str = os.fspath(path)
+        if self.follow_symlinks:
+            # A followed file symlink may point outside the image directories
+            return _dir_prefix(os.path.realpath(path_str)).startswith(self._image_dir_prefixes)
+        
+        if _dir_prefix(path_str).startswith(self._image_dir_prefixes):
             return True
-        except ValueError:
-            return False
+        # Resolve the parent instead of the file: one realpath per directory
+        head, tail = os.path.split(os.path.abspath(path_str))
+        real_path = os.path.join(self._real_directory(head), tail)
+        return _dir_prefix(real_path).startswith(self._image_dir_prefixes)
     
     def get_scan_directories(self) -> list[Path]:
         """Get list of directories to scan, filtered by existence."""
@@ -249,6 +385,174 @@ class ScannerConfig:
         return valid_dirs
 
 
+def _path_parts(path_str: str) -> tuple[list[str], str]:
+    """(Path(path_str).parts, Path(path_str).name), from string operations only."""
+    if os.altsep:
+        path_str = path_str.replace(os.altsep, os.sep)
+    drive, rest = os.path.splitdrive(path_str)
+    if drive.startswith(os.sep):
+        # UNC share (Windows only); leave its anchor rules to pathlib
+        path = Path(path_str)
+        return list(path.parts), path.name
+    # Path drops empty and "." components
+    parts = [part for part in rest.split(os.sep) if part and part != "."]
+    name = parts[-1] if parts else ""
+    if rest.startswith(os.sep):
+        parts.insert(0, drive + os.sep)
+    elif drive:
+        parts.insert(0, drive)
+    return parts, name
+
+
+def _dir_prefix(path_str: str) -> str:
+    """Path string with a trailing separator, for component-safe prefix tests."""
+    return path_str if path_str.endswith(os.sep) else path_str + os.sep
+
+
+def _compile_globs(patterns) -> re.Pattern[str] | None:
+    """Compile glob patterns into one regex matching any of them (like fnmatchcase)."""
+    translated = [fnmatch.translate(p) for p in patterns]
+    if not translated:
+        return None
+    return re.compile("|".join(translated))
+
+
+_GLOB_META = frozenset("*?[")
+
+
+def _is_bucketable(pattern: str) -> bool:
+    """Whether a glob is a plain name, "*X" or "*X*" with X free of metacharacters and separators."""
+    core = pattern[1:] if pattern.startswith("*") else pattern
+    if core.endswith("*") and pattern.startswith("*"):
+        core = core[:-1]
+    return bool(core) and _GLOB_META.isdisjoint(core) and os.sep not in core and "/" not in core
+
+
+def _build_automaton(substrings: tuple[str, ...]):
+    """Aho-Corasick automaton over the substrings, or None without pyahocorasick."""
+    if not AHOCORASICK_AVAILABLE or not substrings:
+        return None
+    automaton = ahocorasick.Automaton()
+    for sub in substrings:
+        automaton.add_word(sub, sub)
+    automaton.make_automaton()
+    return automaton
+
+
+def _contains_any(automaton, substrings: tuple[str, ...], text: str, start: int = 0) -> bool:
+    """Whether any of the substrings occurs in text at or after start."""
+    if automaton is not None:
+        return next(automaton.iter(text, start), None) is not None
+    return any(text.find(sub, start) >= 0 for sub in substrings)
+
+
+def _bucket_globs(
+    patterns,
+) -> tuple[frozenset[str], tuple[str, ...], tuple[str, ...], list[str]]:
+    """Split globs into (literal names, "*X" suffixes, "*X*" substrings, everything else)."""
+    literals: set[str] = set()
+    suffixes: set[str] = set()
+    substrings: set[str] = set()
+    rest: list[str] = []
+    for pattern in patterns:
+        if not _is_bucketable(pattern):
+            rest.append(pattern)
+        elif not pattern.startswith("*"):
+            literals.add(pattern)
+        elif len(pattern) > 2 and pattern.endswith("*"):
+            substrings.add(pattern[1:-1])
+        else:
+            suffixes.add(pattern[1:])
+    return frozenset(literals), tuple(sorted(suffixes)), tuple(sorted(substrings)), rest
+
+
+@lru_cache(maxsize=1)
+def _pil_image():
+    """PIL.Image, imported on first call; None if Pillow isn't installed."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+# JPEG start-of-frame markers (SOF0-SOF15 minus DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _read_image_header_size(file_path: str | os.PathLike[str]) -> tuple[int, int] | None:
+    """
+    Read (width, height) from a PNG, GIF, WebP or JPEG header.
+    
+    Returns None for other formats or headers this parser doesn't handle,
+    so the caller can fall back to PIL.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(64)
+        
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+        
+        if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+            return int.from_bytes(head[6:8], "little"), int.from_bytes(head[8:10], "little")
+        
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 30:
+            chunk = head[12:16]
+            if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+                return (
+                    int.from_bytes(head[26:28], "little") & 0x3FFF,
+                    int.from_bytes(head[28:30], "little") & 0x3FFF,
+                )
+            if chunk == b"VP8L" and head[20] == 0x2F:
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return (
+                    int.from_bytes(head[24:27], "little") + 1,
+                    int.from_bytes(head[27:30], "little") + 1,
+                )
+            return None
+        
+        if head[:2] == b"\xff\xd8":
+            return _read_jpeg_size(f)
+    
+    return None
+
+
+def _read_jpeg_size(f) -> tuple[int, int] | None:
+    """Walk JPEG segments from after SOI to the first start-of-frame marker."""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        if byte != b"\xff":
+            return None
+        marker = f.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD7:
+            continue  # standalone markers carry no length
+        if code in (0xD9, 0xDA):
+            return None  # end of image or scan data before any frame
+        segment = f.read(2)
+        if len(segment) < 2:
+            return None
+        length = int.from_bytes(segment, "big")
+        if code in _JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height = int.from_bytes(frame[1:3], "big")
+            width = int.from_bytes(frame[3:5], "big")
+            # A zero height is defined later by a DNL marker; let PIL decide
+            return (width, height) if height else None
+        if length < 2:
+            return None
+        f.seek(length - 2, os.SEEK_CUR)
+
+
 def _expand_path(path_str: str) -> Path:
     """Expand ~ and environment variables in path string."""
     expanded = os.path.expanduser(os.path.expandvars(path_str))
@@ -256,15 +560,24 @@ def _expand_path(path_str: str) -> Path:
 
 
 def _load_yaml_config(config_path: Path) -> dict[str, Any]:
-    """Load configuration from YAML file."""
-    if not config_path.exists():
+    """Load configuration from YAML file, via its parsed JSON cache when fresh."""
+    try:
+        stat_result = config_path.stat()
+    except OSError:
         logger.warning("Config file not found: %s, using defaults", config_path)
         return {}
     
+    cache_path = _yaml_cache_path(config_path)
+    cached = _read_yaml_cache(cache_path, stat_result)
+    if cached is not None:
+        return cached
+    
     try:
         with open(config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
-            return config if config else {}
+            config = yaml.load(f, Loader=_YAML_LOADER)
+            config = config if config else {}
+        _write_yaml_cache(cache_path, stat_result, config)
+        return config
     except yaml.YAMLError as e:
         logger.error("Failed to parse config file: %s", e)
         return {}
@@ -273,6 +586,44 @@ def _load_yaml_config(config_path: Path) -> dict[str, Any]:
         return {}
 
 
+def _yaml_cache_path(config_path: Path) -> Path:
+    """JSON cache file for a YAML config (scanner_config.yaml.cache.json)."""
+    return config_path.with_suffix(config_path.suffix + ".cache.json")
+
+
+def _read_yaml_cache(cache_path: Path, stat_result: os.stat_result) -> dict[str, Any] | None:
+    """Parsed config from the cache if it was written for this mtime and size."""
+    try:
+        cached = json.loads(cache_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(cached, dict)
+        or cached.get("mtime_ns") != stat_result.st_mtime_ns
+        or cached.get("size") != stat_result.st_size
+        or not isinstance(cached.get("config"), dict)
+    ):
+        return None
+    return cached["config"]
+
+
+def _write_yaml_cache(cache_path: Path, stat_result: os.stat_result, config: Any) -> None:
+    """Persist the parsed config; failures only cost a YAML parse next start."""
+    if not isinstance(config, dict):
+        return
+    payload = {
+        "mtime_ns": stat_result.st_mtime_ns,
+        "size": stat_result.st_size,
+        "config": config,
+    }
+    try:
+        tmp_path = cache_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug("Could not cache parsed config %s: %s", cache_path.name, e)
+
+
 def load_config(config_path: Path | None = None) -> ScannerConfig:
     """
     Load scanner configuration from YAML file.
@@ -341,5 +692,7 @@ def get_config() -> ScannerConfig:
 def reload_config() -> ScannerConfig:
     """Reload configuration from disk."""
     global _config
+    if _config is not None:
+        _config.clear_caches()
     _config = load_config()
     return _config
@@ -10,10 +10,15 @@ All answer-layer intelligence lives in rag_answerer.py.
 """
 from __future__ import annotations
 
+import copy
+import heapq
 import logging
 import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 
 # Import startup to trigger auto-initialization (migrations, etc.)
 import app.startup  # noqa: F401
@@ -23,8 +28,7 @@ from app.embeddings import EmbeddingGenerator
 from app.query_intent import QueryIntent, classify_query
 from app.rag_answerer import (
     extract_best_answer,
-    normalize_whitespace,
-    fix_pdf_spacing,
+    clean_text,
     EvidenceConfidence,
 )
 from app.research_store import ResearchEntry, ResearchStore
@@ -39,6 +43,21 @@ except ImportError:
 
 logger = logging.getLogger("rag")
 
+# Cached answer() responses per service, keyed by normalized query and top_k
+_ANSWER_CACHE_SIZE = 256
+
+# Abstain message when extraction doesn't supply its own
+_NOT_FOUND_MESSAGE = "Answer not clearly found in your indexed documents."
+
+# Streamed answer pieces: a word with its trailing spaces (or leading spaces)
+_STREAM_WORD_RE = re.compile(r"\S+\s*|\s+")
+
+# Word tokens of 3+ characters (shorter words carry little keyword signal)
+_TOKEN_RE = re.compile(r"\w{3,}")
+
+# Chunks whose scoring features are remembered across queries
+_CHUNK_FEATURES_CACHE_SIZE = 1024
+
 
 class SearchService:
     """
@@ -55,6 +74,10 @@ class SearchService:
         self.embedder = EmbeddingGenerator()
         self.store = FAISSVectorStore.load(index_path)
         self.research = ResearchStore.load_or_create(research_path, self.store.dim)
+        # Bounded LRU of answer responses; dropped whenever the index changes
+        self._answer_cache: OrderedDict[tuple[str, int], dict[str, Any]] = OrderedDict()
+        self._answer_cache_signature = self._index_signature()
+        self._answer_cache_lock = threading.Lock()
 
     def search(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
         """Basic search returning ranked document results (no answer extraction)."""
@@ -66,8 +89,8 @@ class SearchService:
         if not results:
             return []
 
-        results.sort(key=lambda item: item.get("final_score", 0), reverse=True)
-        return results[:top_k]
+        # Same order as a stable descending sort, without sorting the tail
+        return heapq.nlargest(top_k, results, key=lambda item: item.get("final_score", 0))
 
     def answer(self, query: str, top_k: int = 6) -> dict[str, Any]:
         """
@@ -75,14 +98,96 @@ class SearchService:
         
         This is the "I know this fact exists somewhere — find it" interface.
         Returns a short, direct, extractive answer when possible.
+        Repeats of a query are served from a cache until the index changes.
         """
-        intent = classify_query(query)
+        cache_key = _answer_cache_key(query, top_k)
+        cached = self._cached_answer(cache_key)
+        if cached is not None:
+            return cached
         
         # Stage A: FAISS retrieval
         results = self._retrieve(query, k=max(top_k * 4, 20))
         
+        response, research_entry = self._answer_from_results(query, results, top_k)
+        if research_entry is not None:
+            self._write_research_entries([research_entry])
+        self._cache_answer(cache_key, response)
+        return response
+
+    def batch_answer(self, queries: list[str], top_k: int = 6) -> list[dict[str, Any]]:
+        """
+        Answer several queries, one response per query (same payload as answer()).
+        
+        Cached queries are answered from the cache; the rest are embedded
+        in one model call and searched in one FAISS call. Research entries
+        for the answered queries are embedded together at the end and the
+        research store is saved once.
+        """
+        responses: list[dict[str, Any] | None] = []
+        misses: list[int] = []
+        for query in queries:
+            cached = self._cached_answer(_answer_cache_key(query, top_k))
+            if cached is None:
+                misses.append(len(responses))
+            responses.append(cached)
+        if not misses:
+            return responses
+        
+        q_embs = self.embedder.embed([queries[i] for i in misses])
+        batch_results = self.store.search_batch(q_embs, k=max(top_k * 4, 20))
+        
+        research_entries = []
+        for i, results in zip(misses, batch_results, strict=True):
+            query = queries[i]
+            self._score_results(query, results)
+            response, research_entry = self._answer_from_results(query, results, top_k)
+            responses[i] = response
+            if research_entry is not None:
+                research_entries.append(research_entry)
+        
+        self._write_research_entries(research_entries)
+        for i in misses:
+            self._cache_answer(_answer_cache_key(queries[i], top_k), responses[i])
+        return responses
+
+    def _index_signature(self) -> tuple[int, int]:
+        """Cheap fingerprint of the loaded index; changes when vectors are added."""
+        return (self.store.index.ntotal, self.store.dim)
+
+    def _cached_answer(self, key: tuple[str, int]) -> dict[str, Any] | None:
+        """Copy of a cached answer response, or None (clears the cache if the index changed)."""
+        signature = self._index_signature()
+        with self._answer_cache_lock:
+            if signature != self._answer_cache_signature:
+                self._answer_cache.clear()
+                self._answer_cache_signature = signature
+                return None
+            response = self._answer_cache.get(key)
+            if response is None:
+                return None
+            self._answer_cache.move_to_end(key)
+        return copy.deepcopy(response)
+
+    def _cache_answer(self, key: tuple[str, int], response: dict[str, Any]) -> None:
+        """Remember a copy of an answer response (callers may mutate theirs)."""
+        response = copy.deepcopy(response)
+        with self._answer_cache_lock:
+            self._answer_cache[key] = response
+            self._answer_cache.move_to_end(key)
+            if len(self._answer_cache) > _ANSWER_CACHE_SIZE:
+                self._answer_cache.popitem(last=False)
+
+    def _answer_from_results(
+        self,
+        query: str,
+        results: list[dict[str, Any]],
+        top_k: int,
+    ) -> tuple[dict[str, Any], ResearchEntry | None]:
+        """Stages B-D for retrieved results: the response plus its research entry, if any."""
+        intent = classify_query(query)
+        
         if not results:
-            return self._empty_response(intent)
+            return self._empty_response(intent), None
         
         # Build document list for UI (always available)
         documents = self._build_document_list(results, limit=top_k)
@@ -90,7 +195,7 @@ class SearchService:
         # For exploratory queries, skip answer extraction
         if intent == QueryIntent.FULLTEXT:
             logger.debug("Exploratory query '%s' — showing documents only.", query)
-            return self._documents_only_response(documents, intent)
+            return self._documents_only_response(documents, intent), None
         
         # Prepare top chunks for extraction
         top_chunks = self._prepare_chunks_for_extraction(results[:8])
@@ -121,21 +226,12 @@ class SearchService:
                     response["source_page"] = location.get("page")
                     response["source_context"] = location.get("context")
             
-            # Write to research memory
-            self._write_research_entry(query, answer_text, results[:1])
-            return response
+            # Written to research memory by the caller
+            return response, self._research_entry(query, answer_text, results[:1])
         
         # Extraction failed — return documents with abstain message
-        return {
-            "answer": answer_payload.get("answer", "Answer not clearly found in your indexed documents."),
-            "confidence": 0.0,
-            "confidence_level": "none",
-            "source": documents[0].get("filename", "") if documents else "",
-            "filepath": documents[0].get("filepath", "") if documents else "",
-            "mode": intent.value,
-            "answerable": False,
-            "documents": documents,
-        }
+        answer = answer_payload.get("answer", _NOT_FOUND_MESSAGE)
+        return self._documents_only_response(documents, intent, answer=answer), None
 
     def _retrieve(self, query: str, k: int) -> list[dict[str, Any]]:
         """
@@ -148,17 +244,17 @@ class SearchService:
         """
         q_emb = self.embedder.embed([query])
         results = self.store.search(q_emb, k=k)
-        
+        self._score_results(query, results)
+        return results
+
+    def _score_results(self, query: str, results: list[dict[str, Any]]) -> None:
+        """Set the hybrid "final_score" on each retrieved result in place."""
         q_terms = _tokenize(query)
         for result in results:
-            text = result.get("text", "")
-            doc_terms = _tokenize(text)
+            doc_terms, length_score = _chunk_features(result.get("text", ""))
             overlap = _keyword_overlap(q_terms, doc_terms)
-            length_score = _length_score(len(text.split()))
             # Hybrid score: semantic + keyword overlap + length
             result["final_score"] = result["score"] + 0.4 * overlap + 0.1 * length_score
-        
-        return results
 
     def _prepare_chunks_for_extraction(self, results: list[dict], max_words: int = 400) -> list[dict[str, Any]]:
         """Prepare chunks for extraction, limiting total word count."""
@@ -167,7 +263,8 @@ class SearchService:
         
         for result in results:
             text = result.get("text", "")
-            words = text.split()
+            # At most remaining + 1 items; no need to split the rest of a long chunk
+            words = text.split(maxsplit=remaining)
             if not words:
                 continue
             
@@ -186,40 +283,52 @@ class SearchService:
         return prepared
 
     def _build_document_list(self, results: list[dict], limit: int) -> list[dict[str, Any]]:
-        """Build unique document list for UI display."""
-        seen_filepaths: set[str] = set()
-        documents: list[dict[str, Any]] = []
-
+        """
+        Build unique document list for UI display.
+        
+        Each file is represented by its best-scoring chunk, and files are
+        ordered by that score. Previews are only built for the files shown.
+        """
+        # filepath -> (score, result); dicts keep first-seen order for ties
+        best: dict[str, tuple[float, dict]] = {}
         for result in results:
             filepath = result.get("filepath", "")
-            if not filepath or filepath in seen_filepaths:
+            if not filepath:
                 continue
-            seen_filepaths.add(filepath)
+            score = float(result.get("final_score", result.get("score", 0.0)))
+            current = best.get(filepath)
+            if current is None or score > current[0]:
+                best[filepath] = (score, result)
 
-            text = normalize_whitespace(fix_pdf_spacing(result.get("text", "")))
-            preview = _make_preview(text, max_words=20)
+        ranked = heapq.nlargest(limit, best.items(), key=lambda item: item[1][0])
 
+        documents: list[dict[str, Any]] = []
+        for filepath, (score, result) in ranked:
+            text = clean_text(result.get("text", ""))
             documents.append({
                 "filepath": filepath,
                 "filename": result.get("filename", ""),
-                "preview": preview,
-                "score": float(result.get("final_score", result.get("score", 0.0))),
+                "preview": _make_preview(text, max_words=20),
+                "score": score,
             })
 
-            if len(documents) >= limit:
-                break
-
         return documents
 
     def _documents_only_response(
         self,
         documents: list[dict],
         intent: QueryIntent,
+        answer: str = "",
     ) -> dict[str, Any]:
-        """Response for exploratory queries — documents only, no answer."""
+        """
+        Response without an extracted answer — documents only.
+        
+        Used for exploratory queries, abstentions (with the abstain message
+        as answer) and, with no documents, empty results.
+        """
         best = documents[0] if documents else {}
         return {
-            "answer": "",
+            "answer": answer,
             "confidence": 0.0,
             "confidence_level": "none",
             "source": best.get("filename", ""),
@@ -231,27 +340,24 @@ class SearchService:
 
     def _empty_response(self, intent: QueryIntent) -> dict[str, Any]:
         """Response when no results found."""
-        return {
-            "answer": "",
-            "confidence": 0.0,
-            "confidence_level": "none",
-            "source": "",
-            "filepath": "",
-            "mode": intent.value,
-            "answerable": False,
-            "documents": [],
-        }
+        return self._documents_only_response([], intent)
 
     def _write_research_entry(self, query: str, answer: str, top_results: list[dict[str, Any]]) -> None:
         """Write successful Q&A to research memory."""
+        entry = self._research_entry(query, answer, top_results)
+        if entry is not None:
+            self._write_research_entries([entry])
+
+    def _research_entry(self, query: str, answer: str, top_results: list[dict[str, Any]]) -> ResearchEntry | None:
+        """Research memory entry for a successful Q&A, or None if there is nothing to store."""
         if not top_results or not answer:
-            return
+            return None
 
         top = top_results[0]
         entry_text = f"Query: {query}\nAnswer: {answer}"
         key = f"{query.lower()}|{top.get('filepath','')}|{top.get('text','')[:200]}"
 
-        entry = ResearchEntry(
+        return ResearchEntry(
             key=key,
             query=query,
             answer=answer,
@@ -259,8 +365,17 @@ class SearchService:
             filepath=top.get("filepath", ""),
             text=entry_text,
         )
-        embedding = self.embedder.embed([entry_text])
-        if self.research.add_entry(embedding, entry):
+
+    def _write_research_entries(self, entries: list[ResearchEntry]) -> None:
+        """Embed research entries in one call and save the store if any were new."""
+        if not entries:
+            return
+
+        embeddings = self.embedder.embed([entry.text for entry in entries])
+        added = False
+        for i, entry in enumerate(entries):
+            added = self.research.add_entry(embeddings[i:i + 1], entry) or added
+        if added:
             self.research.save()
 
     def answer_streaming(
@@ -271,6 +386,7 @@ class SearchService:
         on_answer_token: Callable[[str], None] | None = None,
         on_complete: Callable[[dict], None] | None = None,
         top_k: int = 6,
+        stream_granularity: str = "word",
     ) -> dict[str, Any]:
         """
         Streaming version of answer() with progressive callbacks.
@@ -279,16 +395,33 @@ class SearchService:
             query: The search query
             on_documents: Called when documents are retrieved (before extraction)
             on_status: Called with status updates ("Searching...", "Extracting...")
-            on_answer_token: Called for each character of the answer (typewriter effect)
+            on_answer_token: Called with successive pieces of the answer (typewriter effect)
             on_complete: Called when search is complete with full result
             top_k: Number of results to return
+            stream_granularity: Answer piece size for on_answer_token: "word"
+                (with trailing whitespace) or "char"
         
         Returns:
             Same payload as answer()
         """
+        if stream_granularity not in ("word", "char"):
+            raise ValueError(f"Unknown stream_granularity: {stream_granularity!r}")
+        
         if on_status:
             on_status("Searching...")
         
+        # Replay a cached answer through the same callbacks
+        cache_key = _answer_cache_key(query, top_k)
+        cached = self._cached_answer(cache_key)
+        if cached is not None:
+            if on_documents and cached["documents"]:
+                on_documents(cached["documents"])
+            if on_answer_token and cached["answerable"] and cached["answer"]:
+                _stream_answer(cached["answer"], on_answer_token, stream_granularity)
+            if on_complete:
+                on_complete(cached)
+            return cached
+        
         intent = classify_query(query)
         
         # Stage A: FAISS retrieval
@@ -296,6 +429,7 @@ class SearchService:
         
         if not results:
             result = self._empty_response(intent)
+            self._cache_answer(cache_key, result)
             if on_complete:
                 on_complete(result)
             return result
@@ -308,6 +442,7 @@ class SearchService:
         # For exploratory queries, skip answer extraction
         if intent == QueryIntent.FULLTEXT:
             result = self._documents_only_response(documents, intent)
+            self._cache_answer(cache_key, result)
             if on_complete:
                 on_complete(result)
             return result
@@ -342,24 +477,16 @@ class SearchService:
                     response["source_page"] = location.get("page")
                     response["source_context"] = location.get("context")
             
-            # Stream the answer character by character
+            # Stream the answer; rendering pace is left to the UI
             if on_answer_token and answer_text:
-                for char in answer_text:
-                    on_answer_token(char)
+                _stream_answer(answer_text, on_answer_token, stream_granularity)
             
             self._write_research_entry(query, answer_text, results[:1])
         else:
-            response = {
-                "answer": answer_payload.get("answer", "Answer not clearly found in your indexed documents."),
-                "confidence": 0.0,
-                "confidence_level": "none",
-                "source": documents[0].get("filename", "") if documents else "",
-                "filepath": documents[0].get("filepath", "") if documents else "",
-                "mode": intent.value,
-                "answerable": False,
-                "documents": documents,
-            }
+            answer = answer_payload.get("answer", _NOT_FOUND_MESSAGE)
+            response = self._documents_only_response(documents, intent, answer=answer)
         
+        self._cache_answer(cache_key, response)
         if on_complete:
             on_complete(response)
         
@@ -370,16 +497,40 @@ class SearchService:
 # UTILITY FUNCTIONS
 # =============================================================================
 
+def _stream_answer(text: str, on_answer_token: Callable[[str], None], granularity: str) -> None:
+    """Send the answer to on_answer_token word by word, or one character at a time."""
+    pieces = _STREAM_WORD_RE.findall(text) if granularity == "word" else text
+    for piece in pieces:
+        on_answer_token(piece)
+
+
+def _answer_cache_key(query: str, top_k: int) -> tuple[str, int]:
+    """Answer cache key; case and spacing don't change retrieval or extraction."""
+    return (" ".join(query.lower().split()), top_k)
+
+
 def _tokenize(text: str) -> set[str]:
     """Tokenize text into lowercase words (3+ chars)."""
-    return {t for t in re.findall(r"\w+", text.lower()) if len(t) > 2}
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+@lru_cache(maxsize=_CHUNK_FEATURES_CACHE_SIZE)
+def _chunk_features(text: str) -> tuple[frozenset[str], float]:
+    """
+    Keyword terms and length score of a chunk.
+    
+    Cached, since the same chunks come back for related queries; chunk
+    strings are shared with the index metadata, so their hash is computed
+    once and a hit costs a dict lookup.
+    """
+    return frozenset(_TOKEN_RE.findall(text.lower())), _length_score(len(text.split()))
 
 
-def _keyword_overlap(query_terms: set[str], doc_terms: set[str]) -> float:
-    """Calculate keyword overlap ratio."""
+def _keyword_overlap(query_terms: set[str], doc_terms: Iterable[str]) -> float:
+    """Calculate keyword overlap ratio (doc_terms may repeat, e.g. a token list)."""
     if not query_terms:
         return 0.0
-    return len(query_terms & doc_terms) / len(query_terms)
+    return len(query_terms.intersection(doc_terms)) / len(query_terms)
 
 
 def _length_score(word_count: int) -> float:
@@ -391,9 +542,10 @@ def _length_score(word_count: int) -> float:
 
 def _make_preview(text: str, max_words: int = 20) -> str:
     """Create a short preview snippet."""
-    words = text.split()[:max_words]
-    preview = " ".join(words)
-    if len(text.split()) > max_words:
+    # Split at most max_words times; a leftover item means more words follow
+    words = text.split(maxsplit=max_words)
+    preview = " ".join(words[:max_words])
+    if len(words) > max_words:
         preview += "…"
     return preview
 
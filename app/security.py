@@ -11,17 +11,23 @@ from __future__ import annotations
 
 import base64
 import hashlib
+import io
 import json
 import logging
 import os
 import pickle
 import secrets
+import struct
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Generator
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 logger = logging.getLogger("rag.security")
@@ -34,6 +40,13 @@ except ImportError:
     KEYRING_AVAILABLE = False
     logger.info("keyring not installed - using .env fallback for API keys")
 
+# Optional: orjson formats audit log entries several times faster
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 # ============================================================================
 # Key Management
@@ -54,6 +67,9 @@ class KeyManager:
     def __init__(self, data_dir: Path):
         self.data_dir = data_dir
         self._salt_path = data_dir / ".salt"
+        self._derived_keys_dir = data_dir / ".keys"
+        # Keychain entries can't be listed, so the accounts written are tracked
+        self._keychain_accounts_path = self._derived_keys_dir / "keychain_accounts"
         self._key_cache: dict[str, bytes] = {}
     
     # ---- API Key Management ----
@@ -125,7 +141,11 @@ class KeyManager:
         """
         Derive an encryption key for a specific purpose.
         
-        Uses PBKDF2 with a machine-specific seed.
+        Uses PBKDF2 with a machine-specific seed. The derived key is
+        persisted (Keychain, else a 0600 file under data_dir/.keys) so
+        later process starts skip the 480k PBKDF2 iterations; the stored
+        copy is keyed by a fingerprint of the salt, its mtime, the machine
+        id and the purpose, so it is never used once any of them changes.
         """
         if purpose in self._key_cache:
             return self._key_cache[purpose]
@@ -133,50 +153,303 @@ class KeyManager:
         # Create machine-specific seed
         machine_id = self._get_machine_id()
         salt = self._get_or_create_salt()
+        fingerprint = self._derived_key_fingerprint(salt, machine_id, purpose)
         
-        # Derive key using PBKDF2
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=480000,  # OWASP recommended minimum
-        )
-        
-        seed = f"{machine_id}:{purpose}".encode()
-        key = base64.urlsafe_b64encode(kdf.derive(seed))
+        key = self._load_derived_key(purpose, fingerprint)
+        if key is None:
+            # Derive key using PBKDF2 (cryptography's OpenSSL backend is
+            # faster here than hashlib.pbkdf2_hmac)
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                iterations=480000,  # OWASP recommended minimum
+            )
+            
+            seed = f"{machine_id}:{purpose}".encode()
+            key = base64.urlsafe_b64encode(kdf.derive(seed))
+            self._store_derived_key(purpose, fingerprint, key)
         
         self._key_cache[purpose] = key
         return key
     
+    def _derived_key_fingerprint(self, salt: bytes, machine_id: str, purpose: str) -> str:
+        """Identify the inputs a derived key was computed from."""
+        try:
+            salt_mtime = str(self._salt_path.stat().st_mtime_ns).encode()
+        except OSError:
+            salt_mtime = b""
+        digest = hashlib.sha256()
+        for part in (salt, salt_mtime, machine_id.encode(), purpose.encode()):
+            digest.update(len(part).to_bytes(4, "big"))
+            digest.update(part)
+        return digest.hexdigest()[:16]
+    
+    def _derived_key_account(self, purpose: str, fingerprint: str) -> str:
+        return f"derived:{purpose}:{fingerprint}"
+    
+    @staticmethod
+    def _key_file_name(account: str) -> str:
+        return account.replace(":", "-")
+    
+    def _load_derived_key(self, purpose: str, fingerprint: str) -> bytes | None:
+        """Previously stored key for these inputs, or None."""
+        account = self._derived_key_account(purpose, fingerprint)
+        stored = None
+        if KEYRING_AVAILABLE:
+            try:
+                stored = keyring.get_password(self.SERVICE_NAME, account)
+            except Exception as e:
+                logger.debug("Keychain access failed: %s", e)
+        if not stored:
+            try:
+                stored = (self._derived_keys_dir / self._key_file_name(account)).read_text().strip()
+            except OSError:
+                return None
+        
+        key = stored.encode()
+        try:
+            if len(base64.urlsafe_b64decode(key)) == 32:
+                return key
+        except ValueError:
+            pass
+        logger.warning("Ignoring malformed cached key for %s", purpose)
+        return None
+    
+    def _store_derived_key(self, purpose: str, fingerprint: str, key: bytes) -> None:
+        """
+        Persist a derived key; failures only cost a PBKDF2 run next start.
+        
+        Copies stored for the same purpose under an older fingerprint (e.g.
+        before the salt was rotated) are removed.
+        """
+        account = self._derived_key_account(purpose, fingerprint)
+        # Accounts end in ":<fingerprint>" (hex), so this names the purpose
+        purpose_prefix = account.rsplit(":", 1)[0]
+        
+        try:
+            for path in self._derived_keys_dir.glob("derived-*"):
+                if path.name.rsplit("-", 1)[0] == self._key_file_name(purpose_prefix):
+                    path.unlink()
+        except OSError as e:
+            logger.debug("Could not remove stale key files: %s", e)
+        
+        if KEYRING_AVAILABLE:
+            accounts = []
+            for old in self._tracked_keychain_accounts():
+                if old.rsplit(":", 1)[0] == purpose_prefix:
+                    self._delete_keychain_account(old)
+                else:
+                    accounts.append(old)
+            try:
+                keyring.set_password(self.SERVICE_NAME, account, key.decode())
+                accounts.append(account)
+                self._write_private_file(
+                    self._keychain_accounts_path, "".join(f"{a}\n" for a in accounts).encode()
+                )
+                return
+            except Exception as e:
+                logger.debug("Keychain store failed, using key file: %s", e)
+        
+        try:
+            self._write_private_file(self._derived_keys_dir / self._key_file_name(account), key)
+        except OSError as e:
+            logger.debug("Could not cache derived key: %s", e)
+    
+    def delete_derived_keys(self) -> int:
+        """
+        Remove every persisted derived key, from the Keychain and data_dir/.keys.
+        
+        Returns:
+            Number of stored keys removed
+        """
+        removed = 0
+        if KEYRING_AVAILABLE:
+            for account in self._tracked_keychain_accounts():
+                removed += self._delete_keychain_account(account)
+        try:
+            for path in self._derived_keys_dir.glob("derived-*"):
+                path.unlink()
+                removed += 1
+            self._keychain_accounts_path.unlink(missing_ok=True)
+            self._derived_keys_dir.rmdir()
+        except OSError as e:
+            if self._derived_keys_dir.exists():
+                logger.warning("Could not fully remove %s: %s", self._derived_keys_dir, e)
+        
+        self._key_cache.clear()
+        return removed
+    
+    def _tracked_keychain_accounts(self) -> list[str]:
+        try:
+            return self._keychain_accounts_path.read_text().split()
+        except OSError:
+            return []
+    
+    def _delete_keychain_account(self, account: str) -> bool:
+        try:
+            keyring.delete_password(self.SERVICE_NAME, account)
+            return True
+        except Exception as e:
+            logger.debug("Keychain delete failed for %s: %s", account, e)
+            return False
+    
+    def _write_private_file(self, path: Path, data: bytes) -> None:
+        """Atomically write data to a 0600 file inside a 0700 directory."""
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
     def _get_machine_id(self) -> str:
         """Get a machine-specific identifier."""
-        # Use a combination of factors for machine identification
-        factors = [
-            os.getenv("USER", ""),
-            str(Path.home()),
-            os.uname().nodename if hasattr(os, "uname") else "",
-        ]
-        combined = ":".join(factors).encode()
-        return hashlib.sha256(combined).hexdigest()[:32]
+        return _machine_id()
+
+
+@lru_cache(maxsize=1)
+def _machine_id() -> str:
+    """Machine identifier, computed once per process."""
+    # Use a combination of factors for machine identification. The digest
+    # seeds every derived key, so it must stay stable across versions.
+    factors = [
+        os.getenv("USER", ""),
+        str(Path.home()),
+        os.uname().nodename if hasattr(os, "uname") else "",
+    ]
+    combined = ":".join(factors).encode()
+    return hashlib.sha256(combined).hexdigest()[:32]
 
 
 # ============================================================================
 # Encrypted Storage
 # ============================================================================
 
+_FRAME_LENGTH = struct.Struct(">I")
+
+
+class _EncryptedFrameWriter:
+    """
+    File-like sink that encrypts everything written to it in AES-GCM frames.
+    
+    Each frame is a 4-byte length followed by ciphertext+tag. The nonce is
+    the file's random prefix plus the frame index, and the associated data
+    is the file header plus a final-frame flag, so reordered, dropped or
+    truncated frames fail authentication on read.
+    """
+    
+    def __init__(self, out, aead: AESGCM, header: bytes, nonce_prefix: bytes, chunk_size: int):
+        self._out = out
+        self._aead = aead
+        self._header = header
+        self._nonce_prefix = nonce_prefix
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._index = 0
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        # Keep at least one byte back so the last frame is written by close()
+        while len(self._buffer) > self._chunk_size:
+            self._emit(bytes(self._buffer[:self._chunk_size]), final=False)
+            del self._buffer[:self._chunk_size]
+        return len(data)
+    
+    def close(self) -> None:
+        self._emit(bytes(self._buffer), final=True)
+        self._buffer.clear()
+    
+    def _emit(self, frame: bytes, final: bool) -> None:
+        nonce = self._nonce_prefix + self._index.to_bytes(4, "big")
+        aad = self._header + (b"\x01" if final else b"\x00")
+        ciphertext = self._aead.encrypt(nonce, frame, aad)
+        self._out.write(_FRAME_LENGTH.pack(len(ciphertext)))
+        self._out.write(ciphertext)
+        self._index += 1
+
+
+class _EncryptedFrameReader(io.RawIOBase):
+    """Raw stream that decrypts frames written by _EncryptedFrameWriter."""
+    
+    def __init__(self, src, aead: AESGCM, header: bytes, nonce_prefix: bytes, chunk_size: int):
+        self._src = src
+        self._aead = aead
+        self._header = header
+        self._nonce_prefix = nonce_prefix
+        self._max_frame = chunk_size + 16  # GCM tag
+        self._index = 0
+        self._pending = memoryview(b"")
+        self._next_length = self._read_length()
+        self._done = False
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._done:
+            self._pending = memoryview(self._next_frame())
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+    
+    def _read_length(self) -> int | None:
+        raw = self._src.read(_FRAME_LENGTH.size)
+        if not raw:
+            return None
+        if len(raw) != _FRAME_LENGTH.size:
+            raise ValueError("Truncated encrypted frame")
+        return _FRAME_LENGTH.unpack(raw)[0]
+    
+    def _next_frame(self) -> bytes:
+        length = self._next_length
+        if length is None or length > self._max_frame:
+            raise ValueError("Missing or corrupt encrypted frame")
+        ciphertext = self._src.read(length)
+        if len(ciphertext) != length:
+            raise ValueError("Truncated encrypted frame")
+        
+        # A frame is final exactly when nothing follows it
+        self._next_length = self._read_length()
+        final = self._next_length is None
+        nonce = self._nonce_prefix + self._index.to_bytes(4, "big")
+        aad = self._header + (b"\x01" if final else b"\x00")
+        frame = self._aead.decrypt(nonce, ciphertext, aad)
+        self._index += 1
+        self._done = final
+        return frame
+
+
 class EncryptedStorage:
     """
     Provides encrypted read/write for sensitive data.
     
-    Uses Fernet (AES-128-CBC) symmetric encryption.
+    Uses AES-256-GCM with raw binary output: a 1-byte magic header, a
+    12-byte nonce, then ciphertext and tag. Data written by older versions
+    as Fernet (AES-128-CBC) tokens is still decrypted.
     """
     
+    # Fernet tokens are base64 text starting with "g", so these never collide
+    _AEAD_MAGIC = b"\x01"
+    _STREAM_MAGIC = b"\x02"
+    _NONCE_SIZE = 12
+    _STREAM_CHUNK_SIZE = 256 * 1024
+    
     def __init__(self, key_manager: KeyManager):
         self.key_manager = key_manager
+        self._aead_cache: dict[str, AESGCM] = {}
         self._fernet_cache: dict[str, Fernet] = {}
     
+    def _get_aead(self, purpose: str) -> AESGCM:
+        """Get or create AES-GCM instance for a purpose."""
+        if purpose not in self._aead_cache:
+            key = self.key_manager.derive_key(purpose)
+            self._aead_cache[purpose] = AESGCM(base64.urlsafe_b64decode(key))
+        return self._aead_cache[purpose]
+    
     def _get_fernet(self, purpose: str) -> Fernet:
-        """Get or create Fernet instance for a purpose."""
+        """Get or create Fernet instance for a purpose (legacy data only)."""
         if purpose not in self._fernet_cache:
             key = self.key_manager.derive_key(purpose)
             self._fernet_cache[purpose] = Fernet(key)
@@ -184,13 +457,18 @@ class EncryptedStorage:
     
     def encrypt_data(self, data: bytes, purpose: str = "index") -> bytes:
         """Encrypt raw bytes."""
-        fernet = self._get_fernet(purpose)
-        return fernet.encrypt(data)
+        aead = self._get_aead(purpose)
+        nonce = os.urandom(self._NONCE_SIZE)
+        return self._AEAD_MAGIC + nonce + aead.encrypt(nonce, data, self._AEAD_MAGIC)
     
     def decrypt_data(self, encrypted: bytes, purpose: str = "index") -> bytes:
         """Decrypt raw bytes."""
-        fernet = self._get_fernet(purpose)
-        return fernet.decrypt(encrypted)
+        if encrypted[:1] != self._AEAD_MAGIC:
+            return self._get_fernet(purpose).decrypt(encrypted)
+        
+        aead = self._get_aead(purpose)
+        nonce_end = 1 + self._NONCE_SIZE
+        return aead.decrypt(encrypted[1:nonce_end], encrypted[nonce_end:], self._AEAD_MAGIC)
     
     def save_encrypted_pickle(
         self,
@@ -198,10 +476,21 @@ class EncryptedStorage:
         path: Path,
         purpose: str = "index"
     ) -> None:
-        """Save Python object as encrypted pickle."""
-        raw = pickle.dumps(data)
-        encrypted = self.encrypt_data(raw, purpose)
-        path.write_bytes(encrypted)
+        """
+        Save Python object as encrypted pickle.
+        
+        The pickle is streamed through fixed-size AES-GCM frames, so peak
+        memory stays at one frame rather than the whole serialized object.
+        """
+        aead = self._get_aead(purpose)
+        nonce_prefix = os.urandom(8)
+        header = self._STREAM_MAGIC + nonce_prefix + _FRAME_LENGTH.pack(self._STREAM_CHUNK_SIZE)
+        
+        with open(path, "wb", buffering=1 << 20) as f:
+            f.write(header)
+            writer = _EncryptedFrameWriter(f, aead, header, nonce_prefix, self._STREAM_CHUNK_SIZE)
+            pickle.Pickler(writer, protocol=pickle.HIGHEST_PROTOCOL).dump(data)
+            writer.close()
     
     def load_encrypted_pickle(
         self,
@@ -209,9 +498,21 @@ class EncryptedStorage:
         purpose: str = "index"
     ) -> Any:
         """Load Python object from encrypted pickle."""
-        encrypted = path.read_bytes()
-        raw = self.decrypt_data(encrypted, purpose)
-        return pickle.loads(raw)
+        with open(path, "rb", buffering=1 << 20) as f:
+            magic = f.read(1)
+            if magic != self._STREAM_MAGIC:
+                # Single-blob AES-GCM or legacy Fernet file
+                raw = self.decrypt_data(magic + f.read(), purpose)
+                return pickle.loads(raw)
+            
+            nonce_prefix = f.read(8)
+            length = f.read(_FRAME_LENGTH.size)
+            if len(nonce_prefix) != 8 or len(length) != _FRAME_LENGTH.size:
+                raise ValueError("Truncated encrypted header")
+            (chunk_size,) = _FRAME_LENGTH.unpack(length)
+            header = magic + nonce_prefix + _FRAME_LENGTH.pack(chunk_size)
+            reader = _EncryptedFrameReader(f, self._get_aead(purpose), header, nonce_prefix, chunk_size)
+            return pickle.Unpickler(io.BufferedReader(reader)).load()
     
     def save_encrypted_json(
         self,
@@ -250,10 +551,18 @@ class AuditLogger:
     - Configuration changes
     """
     
+    # Pending batched entries are appended once they reach this many chars
+    _BATCH_FLUSH_SIZE = 64 * 1024
+    # get_recent_entries() reads the log backwards in blocks of this size
+    _TAIL_BLOCK_SIZE = 16 * 1024
+    
     def __init__(self, data_dir: Path, encrypted_storage: EncryptedStorage | None = None):
         self.log_path = data_dir / "audit.log"
         self.encrypted_log_path = data_dir / "audit.log.enc"
         self.storage = encrypted_storage
+        # Batch state is per thread: one shared logger serves the watcher,
+        # scheduler and API threads, and only the batching thread buffers
+        self._local = threading.local()
         self._ensure_log_exists()
     
     def _ensure_log_exists(self) -> None:
@@ -265,7 +574,19 @@ class AuditLogger:
     def _format_entry(self, action: str, details: dict) -> str:
         """Format a log entry."""
         timestamp = datetime.now().isoformat()
-        details_str = json.dumps(details, default=str)
+        details_str = None
+        if ORJSON_AVAILABLE:
+            try:
+                details_str = orjson.dumps(
+                    details, default=str, option=orjson.OPT_NON_STR_KEYS
+                ).decode("utf-8")
+            except TypeError:  # e.g. integers beyond 64 bits
+                pass
+        if details_str is None:
+            # Same compact, non-ASCII-preserving output as orjson
+            details_str = json.dumps(
+                details, default=str, separators=(",", ":"), ensure_ascii=False
+            )
         return f"{timestamp} | {action} | {details_str}\n"
     
     def log(self, action: str, details: dict | None = None) -> None:
@@ -284,9 +605,57 @@ class AuditLogger:
         """
         entry = self._format_entry(action, details or {})
         
+        entries = getattr(self._local, "entries", None)
+        if entries is not None:
+            entries.append(entry)
+            self._local.size += len(entry)
+            if self._local.size >= self._BATCH_FLUSH_SIZE:
+                self._flush_batch()
+            return
+        
+        self._append(entry)
+    
+    @contextmanager
+    def batch(self) -> Generator[None, None, None]:
+        """
+        Buffer events logged inside the block.
+        
+        Entries are appended in one write every 64 KiB and once more on
+        exit, instead of opening the log for each event. Nested calls join
+        the outer batch. Only events from the calling thread are buffered;
+        other threads keep appending directly.
+        
+        Example:
+            with audit.batch():
+                for fp in removed:
+                    audit.log_file_deleted(fp)
+        """
+        if getattr(self._local, "entries", None) is not None:
+            yield
+            return
+        
+        self._local.entries = []
+        self._local.size = 0
+        try:
+            yield
+        finally:
+            self._flush_batch()
+            self._local.entries = None
+    
+    def _flush_batch(self) -> None:
+        """Append the calling thread's pending batched entries."""
+        entries = getattr(self._local, "entries", None)
+        if not entries:
+            return
+        text = "".join(entries)
+        entries.clear()
+        self._local.size = 0
+        self._append(text)
+    
+    def _append(self, text: str) -> None:
         try:
             with open(self.log_path, "a", encoding="utf-8") as f:
-                f.write(entry)
+                f.write(text)
         except Exception as e:
             logger.error("Failed to write audit log: %s", e)
     
@@ -304,7 +673,7 @@ class AuditLogger:
     def log_query(self, query: str, results_count: int) -> None:
         """Log a search query (without storing the actual query for privacy)."""
         self.log("QUERY_PERFORMED", {
-            "query_hash": hashlib.sha256(query.encode()).hexdigest()[:16],
+            "query_hash": hashlib.blake2b(query.encode("utf-8"), digest_size=8).hexdigest(),
             "results_count": results_count,
         })
     
@@ -320,35 +689,71 @@ class AuditLogger:
         self.log("DATA_DELETED", {"deletion_type": deletion_type})
     
     def get_recent_entries(self, count: int = 100) -> list[str]:
-        """Get recent audit log entries."""
+        """
+        Get recent audit log entries.
+        
+        Reads backwards from the end of the log until enough lines are
+        found, so the cost depends on count rather than the log's size.
+        """
+        self._flush_batch()
         try:
-            with open(self.log_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
+            if count <= 0:
+                # lines[-0:] is every line; keep that behaviour
+                with open(self.log_path, "r", encoding="utf-8") as f:
+                    return f.readlines()[-count:]
+            
+            with open(self.log_path, "rb") as f:
+                pos = f.seek(0, os.SEEK_END)
+                blocks: list[bytes] = []
+                newlines = 0
+                # count + 1 newlines guarantees the oldest wanted line is whole
+                while pos > 0 and newlines <= count:
+                    step = min(self._TAIL_BLOCK_SIZE, pos)
+                    pos -= step
+                    f.seek(pos)
+                    block = f.read(step)
+                    blocks.append(block)
+                    newlines += block.count(b"\n")
+            
+            tail = b"".join(reversed(blocks))
+            if pos > 0:
+                tail = tail[tail.index(b"\n") + 1:]
+            lines = io.TextIOWrapper(io.BytesIO(tail), encoding="utf-8").readlines()
             return lines[-count:]
         except Exception:
             return []
     
     def get_stats(self) -> dict:
-        """Get statistics from audit log."""
+        """
+        Get statistics from audit log.
+        
+        Counts action fields with bytes.count() over large raw blocks
+        instead of decoding the log line by line.
+        """
+        self._flush_batch()
+        markers = {
+            "files_indexed": b" | FILE_INDEXED | ",
+            "queries_performed": b" | QUERY_PERFORMED | ",
+            "exports": b" | DATA_EXPORTED | ",
+        }
+        # Bytes carried between blocks so markers spanning a boundary count
+        overlap = max(len(m) for m in markers.values()) - 1
         try:
-            with open(self.log_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            
-            stats = {
-                "total_entries": len(lines),
-                "files_indexed": 0,
-                "queries_performed": 0,
-                "exports": 0,
-            }
+            stats = dict.fromkeys(["total_entries", *markers], 0)
             
-            for line in lines:
-                if "FILE_INDEXED" in line:
-                    stats["files_indexed"] += 1
-                elif "QUERY_PERFORMED" in line:
-                    stats["queries_performed"] += 1
-                elif "DATA_EXPORTED" in line:
-                    stats["exports"] += 1
+            with open(self.log_path, "rb") as f:
+                carry = b""
+                last = b"\n"
+                while block := f.read(1 << 20):
+                    stats["total_entries"] += block.count(b"\n")
+                    last = block[-1:]
+                    window = carry + block
+                    for key, marker in markers.items():
+                        stats[key] += window.count(marker) - carry.count(marker)
+                    carry = window[-overlap:]
             
+            # A final line without a newline still counts as an entry
+            stats["total_entries"] += last != b"\n"
             return stats
         except Exception:
             return {}
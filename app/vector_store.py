@@ -7,6 +7,9 @@ from typing import Any
 import faiss
 import numpy as np
 
+# Fields every search result carries, even when a chunk's metadata lacks them.
+_RESULT_DEFAULTS = {"text": "", "filename": "", "filepath": ""}
+
 
 class FAISSVectorStore:
     def __init__(self, dim: int) -> None:
@@ -22,8 +25,8 @@ class FAISSVectorStore:
     def add(self, embeddings: np.ndarray, metadatas: list[dict[str, Any]]) -> None:
         if len(metadatas) != len(embeddings):
             raise ValueError("Embeddings and metadata length mismatch.")
-        if embeddings.dtype != np.float32:
-            embeddings = embeddings.astype("float32")
+        # One conversion pass at most; already float32 C-order input is not copied.
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
         if embeddings.ndim != 2 or embeddings.shape[1] != self.index.d:
             raise ValueError("Embeddings shape does not match index dimension.")
 
@@ -36,22 +39,27 @@ class FAISSVectorStore:
         if query_embedding.ndim != 2:
             raise ValueError("Query embedding must be 2D (batch, dim).")
 
-        scores, ids = self.index.search(query_embedding, k)
-        results = []
-        for score, idx in zip(scores[0], ids[0]):
-            if idx == -1:
-                continue
-            meta = dict(self.metadata[idx])
-            results.append(
-                {
-                    "score": float(score),
-                    "text": meta.get("text", ""),
-                    "filename": meta.get("filename", ""),
-                    "filepath": meta.get("filepath", ""),
-                    **meta,
-                }
-            )
-        return results
+        return self.search_batch(query_embedding[:1], k=k)[0]
+
+    def search_batch(self, query_embeddings: np.ndarray, k: int = 5) -> list[list[dict[str, Any]]]:
+        # One FAISS call for the whole (batch, dim) matrix; one result list per row.
+        if query_embeddings.ndim != 2:
+            raise ValueError("Query embeddings must be 2D (batch, dim).")
+        if self.index.ntotal == 0:
+            return [[] for _ in range(len(query_embeddings))]
+
+        scores, ids = self.index.search(query_embeddings, k)
+        return [self._results(row_scores, row_ids) for row_scores, row_ids in zip(scores, ids)]
+
+    def _results(self, scores: np.ndarray, ids: np.ndarray) -> list[dict[str, Any]]:
+        # Metadata is unpacked straight into the result after the defaults, so its
+        # own values win and each result is built in a single dict display.
+        metadata = self.metadata
+        return [
+            {"score": score, **_RESULT_DEFAULTS, **metadata[idx]}
+            for score, idx in zip(scores.tolist(), ids.tolist())
+            if idx != -1
+        ]
 
     def save(self, path: str | Path) -> None:
         base = Path(path)
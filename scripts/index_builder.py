@@ -33,13 +33,15 @@ def build_index() -> None:
 
     print(f"📥 Ingesting documents from {DOCS_DIR}...")
     ingester = DocumentIngester(DOCS_DIR)
-    docs = ingester.ingest_all()
+    docs = ingester.iter_all()
 
     print("✂️ Chunking documents...")
     texts: list[str] = []
     metas: list[dict] = []
+    doc_count = 0
 
     for doc in docs:
+        doc_count += 1
         for c in chunk(doc["content"], chunk_size=240, overlap=40):
             if len(c.split()) < 10:
                 continue
@@ -53,6 +55,9 @@ def build_index() -> None:
                 }
             )
 
+    if not doc_count:
+        raise RuntimeError("All documents were empty after ingestion.")
+
     if not texts:
         raise RuntimeError(
             "No text chunks produced. Check ingestion output or lower chunk size."
@@ -70,7 +75,7 @@ def build_index() -> None:
     store.add(embeddings, metas)
     store.save(INDEX_PATH)
 
-    print(f"✅ Indexed {len(texts)} chunks from {len(docs)} files")
+    print(f"✅ Indexed {len(texts)} chunks from {doc_count} files")
 
 
 def main() -> None:
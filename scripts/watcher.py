@@ -133,20 +133,16 @@ class DeviceIndexer:
             
             print(f"📄 Indexing: {file_path.name}")
             
-            # Read file content
+            # Read and chunk the content (PDFs stream page by page)
             try:
-                content = self.ingester._read_file(file_path)
-                if not content or len(content.split()) < 10:
-                    print(f"   ⚠️  No content extracted from {file_path.name}")
-                    return 0
+                stream = self.ingester._read_file_stream(file_path)
+                chunks = list(chunk(stream, chunk_size=240, overlap=40))
             except Exception as e:
                 print(f"   ❌ Failed to read {file_path.name}: {e}")
                 return 0
             
-            # Chunk the content
-            chunks = list(chunk(content, chunk_size=240, overlap=40))
             if not chunks:
-                print(f"   ⚠️  No chunks produced from {file_path.name}")
+                print(f"   ⚠️  No content extracted from {file_path.name}")
                 return 0
             
             # Filter small chunks and prepare metadata
@@ -1,6 +1,10 @@
 """
 Tests for the chunker module.
 """
+import numpy as np
+import pytest
+
+from app import chunker
 from app.chunker import chunk
 
 
@@ -82,3 +86,42 @@ class TestChunker:
         combined = " ".join(result)
         assert "2024" in combined
         assert "1,500,000" in combined
+
+    def test_chunk_overlap_carries_tail_sentence(self):
+        """The next chunk should start with the tail of the previous one."""
+        sentences = ["Sentence number {} ends here.".format(i) for i in range(40)]
+        text = " ".join(sentences)
+
+        result = list(chunk(text, chunk_size=20, overlap=5))
+
+        assert len(result) > 1
+        for prev, nxt in zip(result, result[1:]):
+            last_sentence = prev.rsplit(". ", 1)[-1]
+            assert nxt.startswith(last_sentence.rstrip("."))
+
+    def test_chunk_accepts_page_stream(self):
+        """Chunking a stream of pages should match chunking the joined text."""
+        pages = [
+            "Page one starts here. It continues onto the",
+            "next page without a break. Page two has its own sentence.",
+            "",
+            "Final page. Done!",
+        ]
+
+        streamed = list(chunk(iter(pages), chunk_size=12, overlap=4))
+        joined = list(chunk("\n".join(pages), chunk_size=12, overlap=4))
+
+        assert streamed == joined
+        assert any("onto the next page" in c for c in streamed)
+
+    @pytest.mark.skipif(not chunker.NUMBA_AVAILABLE, reason="numba not installed")
+    def test_compiled_packing_matches_python(self):
+        """The JIT-compiled packing loop should agree with its Python source."""
+        lens = [3, 17, 8, 1, 25, 9, 9, 4, 30, 2, 11, 6]
+        cum = np.zeros(len(lens) + 1, dtype=np.int64)
+        np.cumsum(lens, out=cum[1:])
+
+        for chunk_size, overlap, min_end in [(20, 5, 1), (10, 0, 1), (40, 15, 3)]:
+            compiled = chunker._pack_bounds(cum, chunk_size, overlap, min_end)
+            python = chunker._pack_bounds.py_func(cum, chunk_size, overlap, min_end)
+            assert compiled.tolist() == python.tolist()
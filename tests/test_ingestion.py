@@ -85,6 +85,20 @@ class TestDocumentIngester:
         assert all("filename" in r for r in results)
         assert all("content" in r for r in results)
 
+    def test_iter_all_streams_documents(self, temp_dir):
+        """iter_all should yield documents lazily and fail fast on bad dirs."""
+        (temp_dir / "doc1.txt").write_text("Document one content here.")
+        (temp_dir / "empty.txt").write_text("")
+
+        ingester = DocumentIngester(temp_dir)
+        docs = ingester.iter_all()
+
+        assert not isinstance(docs, list)
+        assert [d["filename"] for d in docs] == ["doc1.txt"]
+
+        with pytest.raises(RuntimeError, match="Docs directory not found"):
+            DocumentIngester(temp_dir / "missing").iter_all()
+
     def test_ingest_files_parallel(self, temp_dir):
         """Parallel ingestion should work."""
         # Create test files
@@ -98,6 +112,23 @@ class TestDocumentIngester:
         
         assert len(results) == 5
 
+    def test_iter_all_parallel_mixed_formats(self, temp_dir):
+        """DOCX files should be parsed in worker processes alongside text files."""
+        from docx import Document
+
+        for i in range(2):
+            doc = Document()
+            doc.add_paragraph(f"Word document {i} body.")
+            doc.save(temp_dir / f"report{i}.docx")
+            (temp_dir / f"note{i}.txt").write_text(f"Text note {i} body.")
+
+        ingester = DocumentIngester(temp_dir)
+        docs = {d["filename"]: d["content"] for d in ingester.iter_all(parallel=True, max_workers=2)}
+
+        assert sorted(docs) == ["note0.txt", "note1.txt", "report0.docx", "report1.docx"]
+        assert "Word document 1 body." in docs["report1.docx"]
+        assert docs["note0.txt"] == "Text note 0 body."
+
     def test_image_dimension_check_small(self, temp_dir):
         """Small images should be rejected."""
         ingester = DocumentIngester(temp_dir)
@@ -132,6 +163,25 @@ class TestDocumentIngester:
             # This will use the mocked Image
             # Note: actual test depends on PIL being available
 
+    def test_read_image_uses_description_cache(self, temp_dir):
+        """A cached description should be returned without calling the API."""
+        import hashlib
+
+        image = temp_dir / "photo.png"
+        image.write_bytes(b"fake png bytes")
+        cache_dir = temp_dir / "cache"
+        cache_dir.mkdir()
+        digest = hashlib.blake2b(image.read_bytes(), digest_size=16).hexdigest()
+        (cache_dir / f"{digest}.txt").write_text("A cached description.")
+
+        ingester = DocumentIngester(temp_dir, image_cache_dir=cache_dir)
+        with patch.object(ingester, "_is_image_large_enough", return_value=True), \
+             patch.object(ingester, "_get_openai_client") as mock_client:
+            result = ingester._read_image(image)
+
+        assert result == "[Image: photo.png]\nA cached description."
+        mock_client.assert_not_called()
+
     def test_ingest_skips_empty_files(self, temp_dir):
         """Ingester should skip empty files."""
         (temp_dir / "empty.txt").write_text("")
@@ -141,6 +141,40 @@ class TestFullPipeline:
         pass  # Skipped due to FAISS compatibility issues in test env
 
 
+class TestEmbeddingGenerator:
+    """Tests for embedding output formats (model mocked)."""
+
+    @patch("app.embeddings.get_cached_model")
+    def test_embedding_empty_input_shape(self, mock_model):
+        """Embedding no texts should give a (0, dim) array."""
+        from app.embeddings import EmbeddingGenerator
+        
+        mock_model.return_value.get_sentence_embedding_dimension.return_value = 384
+        
+        embeddings = EmbeddingGenerator().embed([])
+        
+        assert embeddings.shape == (0, 384)
+        assert embeddings.dtype == np.float32
+        mock_model.return_value.encode.assert_not_called()
+
+    @patch("app.embeddings.get_cached_model")
+    def test_embedding_int8_quantization(self, mock_model):
+        """Int8 embeddings should round-trip close to the float32 values."""
+        from app.embeddings import EmbeddingGenerator, dequantize_int8
+        
+        vectors = np.random.rand(3, 384).astype("float32") - 0.5
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        mock_model_instance = MagicMock()
+        mock_model_instance.encode.return_value = vectors
+        mock_model.return_value = mock_model_instance
+        
+        codes = EmbeddingGenerator().embed_int8(["a", "b", "c"])
+        
+        assert codes.dtype == np.int8
+        assert codes.shape == (3, 384)
+        np.testing.assert_allclose(dequantize_int8(codes), vectors, atol=1 / 127)
+
+
 class TestQueryFiltersIntegration:
     """Test natural language filters with search."""
 
@@ -220,10 +254,32 @@ class TestManifestIntegration:
         # Should need re-indexing
         assert manifest.needs_indexing(test_file)
 
+    def test_manifest_deleted_files(self, temp_dir):
+        """Test SQL-side deleted file detection."""
+        from app.manifest_db import SQLiteManifest
+
+        manifest = SQLiteManifest(temp_dir / "manifest.db")
+        files = []
+        for i in range(3):
+            path = temp_dir / f"doc{i}.txt"
+            path.write_text(f"Document {i}")
+            files.append(path)
+            manifest.mark_indexed(path, chunk_count=1)
+
+        assert manifest.get_stats()["total_files"] == 3
+        current = {str(files[0]), str(temp_dir / "new.txt")}
+        assert manifest.find_deleted_files(current) == {str(files[1]), str(files[2])}
+
 
 class TestSecurityIntegration:
     """Test security module integration."""
 
+    @pytest.fixture(autouse=True)
+    def no_keychain(self):
+        """Keep derived keys out of the real Keychain; tests use the key file."""
+        with patch("app.security.KEYRING_AVAILABLE", False):
+            yield
+
     def test_keychain_fallback(self, temp_dir):
         """Test API key retrieval with fallback."""
         from app.security import KeyManager
@@ -251,6 +307,68 @@ class TestSecurityIntegration:
         loaded = storage.load_encrypted_json(temp_dir / "encrypted.json")
         assert loaded == test_data
 
+    def test_encrypted_storage_reads_legacy_fernet(self, temp_dir):
+        """Data written as Fernet tokens should still load after the AES-GCM switch."""
+        from app.security import EncryptedStorage, KeyManager
+        
+        storage = EncryptedStorage(KeyManager(temp_dir))
+        legacy = storage._get_fernet("index").encrypt(b"legacy payload")
+        
+        assert storage.decrypt_data(legacy) == b"legacy payload"
+        assert storage.encrypt_data(b"new payload")[:1] == EncryptedStorage._AEAD_MAGIC
+
+    def test_encrypted_pickle_streams_frames(self, temp_dir):
+        """Multi-frame pickles should round-trip; truncated frames or headers are rejected."""
+        from cryptography.exceptions import InvalidTag
+        from app.security import EncryptedStorage, KeyManager
+        
+        storage = EncryptedStorage(KeyManager(temp_dir))
+        path = temp_dir / "metadata.pkl"
+        data = [bytes([i]) * 100_000 for i in range(8)]
+        
+        storage.save_encrypted_pickle(data, path)
+        assert storage.load_encrypted_pickle(path) == data
+        
+        path.write_bytes(path.read_bytes()[:-100])
+        with pytest.raises((ValueError, InvalidTag)):
+            storage.load_encrypted_pickle(path)
+        
+        path.write_bytes(path.read_bytes()[:5])
+        with pytest.raises(ValueError, match="header"):
+            storage.load_encrypted_pickle(path)
+
+    def test_derived_key_cached_across_instances(self, temp_dir):
+        """A second KeyManager should reuse the stored key instead of running PBKDF2."""
+        from app.security import KeyManager
+        
+        key = KeyManager(temp_dir).derive_key("metadata")
+        assert (temp_dir / ".keys").is_dir()
+        
+        with patch("app.security.PBKDF2HMAC") as mock_kdf:
+            assert KeyManager(temp_dir).derive_key("metadata") == key
+            mock_kdf.assert_not_called()
+
+    def test_derived_keys_deleted_from_keychain(self, temp_dir):
+        """Keychain copies should be tracked, replaced on salt rotation and deleted."""
+        from app.security import KeyManager
+        
+        with patch("app.security.KEYRING_AVAILABLE", True), \
+                patch("app.security.keyring", create=True) as mock_keyring:
+            mock_keyring.get_password.return_value = None
+            km = KeyManager(temp_dir)
+            km.derive_key("metadata")
+            first = mock_keyring.set_password.call_args.args[1]
+            
+            (temp_dir / ".salt").write_bytes(b"rotated salt 123")
+            KeyManager(temp_dir).derive_key("metadata")
+            mock_keyring.delete_password.assert_called_once_with(KeyManager.SERVICE_NAME, first)
+            second = mock_keyring.set_password.call_args.args[1]
+            
+            assert KeyManager(temp_dir).delete_derived_keys() == 1
+            mock_keyring.delete_password.assert_called_with(KeyManager.SERVICE_NAME, second)
+        
+        assert not (temp_dir / ".keys").exists()
+
     def test_audit_logging(self, temp_dir):
         """Test audit log writes."""
         from app.security import AuditLogger
@@ -268,6 +386,72 @@ class TestSecurityIntegration:
         assert "FILE_INDEXED" in content
         assert "QUERY_PERFORMED" in content
 
+    def test_audit_log_tail_and_stats(self, temp_dir):
+        """Tail reads across block boundaries should match a full read."""
+        from app.security import AuditLogger
+        
+        audit = AuditLogger(temp_dir)
+        audit._TAIL_BLOCK_SIZE = 64
+        for i in range(20):
+            audit.log_file_indexed(f"/docs/{i}.txt", chunks=i)
+        audit.log_query("test query", results_count=3)
+        
+        lines = (temp_dir / "audit.log").read_text().splitlines(keepends=True)
+        assert audit.get_recent_entries(5) == lines[-5:]
+        assert audit.get_recent_entries(100) == lines
+        assert audit.get_stats() == {
+            "total_entries": 21,
+            "files_indexed": 20,
+            "queries_performed": 1,
+            "exports": 0,
+        }
+
+    def test_audit_log_batch(self, temp_dir):
+        """Batched events should be written together when the block exits."""
+        from app.security import AuditLogger
+        
+        audit = AuditLogger(temp_dir)
+        log_path = temp_dir / "audit.log"
+        
+        with audit.batch():
+            for i in range(3):
+                audit.log_file_deleted(f"/docs/{i}.txt")
+            assert log_path.read_text() == ""
+        
+        assert log_path.read_text().count("FILE_DELETED") == 3
+
+    def test_audit_log_batch_is_per_thread(self, temp_dir):
+        """Other threads should write straight through an open batch."""
+        import threading
+        from app.security import AuditLogger
+        
+        audit = AuditLogger(temp_dir)
+        log_path = temp_dir / "audit.log"
+        
+        with audit.batch():
+            audit.log_file_deleted("/docs/batched.txt")
+            worker = threading.Thread(target=audit.log_file_indexed, args=("/docs/other.txt", 2))
+            worker.start()
+            worker.join()
+            assert "FILE_INDEXED" in log_path.read_text()
+            assert "FILE_DELETED" not in log_path.read_text()
+        
+        content = log_path.read_text()
+        assert content.count("FILE_INDEXED") == 1
+        assert content.count("FILE_DELETED") == 1
+
+    def test_audit_entry_json_fallback(self, temp_dir):
+        """Without orjson, entries should be formatted the same way."""
+        from app.security import AuditLogger
+        
+        audit = AuditLogger(temp_dir)
+        details = {"file": "/docs/résumé.txt", "chunks": [1, 2]}
+        
+        with patch("app.security.ORJSON_AVAILABLE", False):
+            entry = audit._format_entry("FILE_INDEXED", details)
+        
+        assert entry.endswith(' | FILE_INDEXED | {"file":"/docs/résumé.txt","chunks":[1,2]}\n')
+
 
 class TestPrivacyIntegration:
     """Test privacy controls integration."""
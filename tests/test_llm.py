@@ -0,0 +1,128 @@
+"""
+Tests for the LLM client module.
+"""
+import pytest
+
+from app import llm
+
+
+@pytest.fixture(autouse=True)
+def clear_llm_cache():
+    """Keep cached LLM results from leaking between tests."""
+    llm.clear_cache()
+    yield
+    llm.clear_cache()
+
+
+class TestExtractAnswerFromChunk:
+    """Tests for GPT extraction calls."""
+
+    def test_parses_json_response(self, mock_openai_client):
+        """Extraction should return the parsed answer and confidence."""
+        result = llm.extract_answer_from_chunk("What is the salary?", "Salary is $150,000 per year.")
+
+        assert result == {"answer": "$150,000 per year", "confidence": 0.95}
+
+    def test_strips_markdown_code_fence(self, mock_openai_client):
+        """JSON wrapped in a ```json fence should still parse."""
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.content = (
+            '```json\n{"answer": "Acme", "confidence": 0.8}\n```'
+        )
+
+        result = llm.extract_answer_from_chunk("Where?", "He works at Acme.")
+
+        assert result == {"answer": "Acme", "confidence": 0.8}
+
+    def test_strips_tagged_code_fence(self, mock_openai_client):
+        """Any info string on the opening fence, like ```JSON, should be dropped."""
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.content = (
+            '```JSON\n{"answer": "Acme", "confidence": 0.8}\n```'
+        )
+
+        result = llm.extract_answer_from_chunk("Where?", "He works at Acme.")
+
+        assert result == {"answer": "Acme", "confidence": 0.8}
+
+    def test_repeat_query_uses_cache(self, mock_openai_client):
+        """The same (query, chunk) pair should only hit the API once."""
+        chunk_text = "Salary is $150,000 per year."
+
+        first = llm.extract_answer_from_chunk("What is the salary?", chunk_text)
+        second = llm.extract_answer_from_chunk("  what is the SALARY? ", chunk_text)
+
+        assert first == second
+        assert mock_openai_client.chat.completions.create.call_count == 1
+
+    def test_failures_are_not_cached(self, mock_openai_client):
+        """A failed call should be retried on the next request."""
+        mock_openai_client.chat.completions.create.side_effect = [
+            RuntimeError("network down"),
+            mock_openai_client.chat.completions.create.return_value,
+        ]
+
+        assert llm.extract_answer_from_chunk("q?", "text")["answer"] == "NONE"
+        assert llm.extract_answer_from_chunk("q?", "text")["answer"] == "$150,000 per year"
+
+
+class TestCompressAnswer:
+    """Tests for answer compression."""
+
+    def test_short_answer_skips_api(self, mock_openai_client):
+        """Answers within the word limit should be returned unchanged."""
+        assert llm.compress_answer("Short answer.") == "Short answer."
+        mock_openai_client.chat.completions.create.assert_not_called()
+
+    def test_first_sentence_shortcut(self, mock_openai_client):
+        """A first sentence holding all key facts should be used without the API."""
+        answer = (
+            "John Smith earns $150,000 per year at Acme. "
+            "He has been with the company for a while and enjoys the work "
+            "his team does with him every single day."
+        )
+
+        assert llm.compress_answer(answer) == "John Smith earns $150,000 per year at Acme."
+        mock_openai_client.chat.completions.create.assert_not_called()
+
+    def test_first_sentence_missing_facts_uses_api(self, mock_openai_client):
+        """Facts beyond the first sentence should force an LLM compression."""
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.content = "Short."
+        answer = (
+            "John Smith works at Acme as an engineer on the platform team. "
+            "He started on January 15, 2024 and earns a salary of $150,000 every year."
+        )
+
+        assert llm.compress_answer(answer) == "Short."
+        mock_openai_client.chat.completions.create.assert_called_once()
+
+    def test_number_inside_larger_number_uses_api(self, mock_openai_client):
+        """A number found only as a substring of another ("5" in "$15,000") isn't kept."""
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.content = "Short."
+        answer = (
+            "The contract fee was $15,000 for the Boston office last year. "
+            "Prices then rose by 5 percent across every region the company serves "
+            "and most clients renewed anyway."
+        )
+
+        assert llm.compress_answer(answer) == "Short."
+        mock_openai_client.chat.completions.create.assert_called_once()
+
+    def test_name_opening_later_sentence_uses_api(self, mock_openai_client):
+        """A name that starts a later sentence should count as a key fact."""
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.content = "Short."
+        answer = (
+            "The contract fee was $15,000 for the Boston office last year. "
+            "Alice approved the payment after a long review with the finance group "
+            "and the legal department."
+        )
+
+        assert llm.compress_answer(answer) == "Short."
+        mock_openai_client.chat.completions.create.assert_called_once()
+
+    def test_repeat_compression_uses_cache(self, mock_openai_client):
+        """Compressing the same answer twice should only hit the API once."""
+        mock_openai_client.chat.completions.create.return_value.choices[0].message.content = "Short."
+        answer = " ".join(["word"] * 40)
+
+        assert llm.compress_answer(answer) == "Short."
+        assert llm.compress_answer(answer) == "Short."
+        assert mock_openai_client.chat.completions.create.call_count == 1
@@ -1,6 +1,7 @@
 """
 Tests for the privacy module.
 """
+import csv
 import json
 import pytest
 from unittest.mock import patch
@@ -52,6 +53,22 @@ class TestPrivacyManager:
         assert all("filepath" in f for f in files)
         assert all("filename" in f for f in files)
 
+    def test_list_indexed_files_limit(self, privacy_manager, temp_dir):
+        """A limit should return the newest files in the same order as a full listing."""
+        manifest_data = {
+            "files": {
+                f"/docs/doc{i}.pdf": {"indexed_at": f"2024-01-{10 + (i * 7) % 19:02d}T00:00:00"}
+                for i in range(30)
+            }
+        }
+        (temp_dir / "scan_manifest.json").write_text(json.dumps(manifest_data))
+        
+        full = privacy_manager.list_indexed_files()
+        top = privacy_manager.list_indexed_files(limit=5)
+        
+        assert top == full[:5]
+        assert len(privacy_manager.list_indexed_files(limit=5, sort=False)) == 5
+
     def test_get_storage_stats_empty(self, privacy_manager):
         """Empty storage should return zero stats."""
         stats = privacy_manager.get_storage_stats()
@@ -75,6 +92,20 @@ class TestPrivacyManager:
         assert stats["total_files"] == 2
         assert stats["total_chunks"] == 15
 
+    def test_get_storage_stats_component_sizes(self, privacy_manager, temp_dir):
+        """Component sizes should come from the single storage walk."""
+        (temp_dir / "scan_manifest.json").write_text(json.dumps({"files": {}}) + " " * 2048)
+        (temp_dir / "index.faiss").write_bytes(b"\0" * (3 * 1024 * 1024))
+        (temp_dir / "nested").mkdir()
+        (temp_dir / "nested" / "extra.bin").write_bytes(b"\0" * (1024 * 1024))
+        
+        with patch("app.privacy.INDEX_PATH", temp_dir / "index"):
+            stats = privacy_manager.get_storage_stats()
+        
+        assert stats["index_size_mb"] == 3.0
+        assert stats["manifest_size_kb"] > 2
+        assert stats["total_storage_mb"] >= 4.0
+
     def test_export_manifest(self, privacy_manager, temp_dir):
         """Should export manifest to file."""
         # Create manifest
@@ -101,6 +132,35 @@ class TestPrivacyManager:
         
         assert result is False
 
+    def test_export_indexed_files_csv(self, privacy_manager, temp_dir):
+        """CSV export should have a header and one row per indexed file."""
+        manifest_data = {
+            "files": {
+                "/path/to/doc1.pdf": {"indexed_at": "2024-01-15", "chunk_count": 5, "size": 1024},
+                "/path/to/doc2.txt": {"chunk_count": 3},
+            }
+        }
+        (temp_dir / "scan_manifest.json").write_text(json.dumps(manifest_data))
+        
+        output_path = temp_dir / "files.csv"
+        assert privacy_manager.export_indexed_files_csv(output_path) is True
+        
+        with open(output_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["filepath", "filename", "indexed_at", "chunk_count", "size_bytes"]
+        assert rows[1] == ["/path/to/doc1.pdf", "doc1.pdf", "2024-01-15", "5", "1024"]
+        assert rows[2] == ["/path/to/doc2.txt", "doc2.txt", "unknown", "3", "0"]
+
+    def test_export_audit_log(self, privacy_manager, temp_dir):
+        """Audit log export should be a byte-for-byte copy."""
+        content = "".join(f"2024-01-01T00:00:{i % 60:02d} | search | ok\n" for i in range(5000))
+        (temp_dir / "audit.log").write_text(content)
+        
+        output_path = temp_dir / "exported_audit.log"
+        assert privacy_manager.export_audit_log(output_path) is True
+        
+        assert output_path.read_text() == content
+
     def test_delete_file_from_index(self, privacy_manager, temp_dir):
         """Should remove file from manifest."""
         manifest_data = {
@@ -121,6 +181,25 @@ class TestPrivacyManager:
         assert "/doc1.pdf" not in updated["files"]
         assert "/doc2.pdf" in updated["files"]
 
+    def test_delete_files_from_index_bulk(self, privacy_manager, temp_dir):
+        """Bulk deletion should remove all known paths in one rewrite."""
+        manifest_data = {
+            "files": {f"/doc{i}.pdf": {"chunk_count": i} for i in range(5)},
+            "last_full_scan": "2024-01-01",
+        }
+        manifest_path = temp_dir / "scan_manifest.json"
+        manifest_path.write_text(json.dumps(manifest_data))
+        
+        removed = privacy_manager.delete_files_from_index(
+            ["/doc1.pdf", "/doc3.pdf", "/doc3.pdf", "/missing.pdf"]
+        )
+        
+        assert removed == 2
+        updated = json.loads(manifest_path.read_text())
+        assert sorted(updated["files"]) == ["/doc0.pdf", "/doc2.pdf", "/doc4.pdf"]
+        assert updated["last_full_scan"] == "2024-01-01"
+        assert privacy_manager.get_indexed_file_count() == 3
+
     def test_delete_nonexistent_file(self, privacy_manager, temp_dir):
         """Deleting nonexistent file should return False."""
         manifest_data = {"files": {"/doc.pdf": {"chunk_count": 5}}}
@@ -183,3 +262,15 @@ class TestPrivacyManager:
         
         count = privacy_manager.get_indexed_file_count()
         assert count == 3
+
+    def test_manifest_cache_reloads_after_rewrite(self, privacy_manager, temp_dir):
+        """Parsed manifest should be reused until the file changes."""
+        manifest_path = temp_dir / "scan_manifest.json"
+        manifest_path.write_text(json.dumps({"files": {"/doc1.pdf": {}}}))
+        
+        first = privacy_manager._load_manifest()
+        assert privacy_manager._load_manifest() is first
+        
+        manifest_path.write_text(json.dumps({"files": {"/doc1.pdf": {}, "/doc2.pdf": {}}}))
+        
+        assert privacy_manager.get_indexed_file_count() == 2
@@ -6,11 +6,15 @@ from unittest.mock import patch
 from app.rag_answerer import (
     extract_best_answer,
     propose_answer_from_chunk,
+    propose_answers_for_chunks,
     select_best_answer,
     compress_answer_if_needed,
     normalize_whitespace,
     fix_pdf_spacing,
+    clean_text,
     AnswerCandidate,
+    ORG_PATTERN,
+    _search_org,
 )
 
 
@@ -42,6 +46,33 @@ class TestTextUtilities:
         # Should join spaced letters
         assert "A B C D" not in result or result == "ABCD"
 
+    def test_clean_text_matches_two_step_cleanup(self):
+        """The single-pass cleanup should match fix_pdf_spacing + normalize_whitespace."""
+        samples = [
+            "The base sal-  ary is $120,000 , effective\nJanuary 1 .",
+            "S a l a r y\treview  happens annually !",
+            "a b c- d e",
+            "  docu-\nment   ,trailing  ",
+            "x- y- z",
+            "",
+        ]
+        for text in samples:
+            assert clean_text(text) == normalize_whitespace(fix_pdf_spacing(text))
+
+    def test_search_org_matches_pattern_search(self):
+        """The run-skipping organization search should find the same spans."""
+        samples = [
+            "She joined Acme Widgets Inc. in 2019.",
+            "Offer from AT&T Co and Big Bank today",
+            "Alpha Beta Gamma lowercase then Stanford University",
+            " ".join(["Alpha"] * 500) + " done",
+            "no organizations here",
+        ]
+        for text in samples:
+            expected = ORG_PATTERN.search(text)
+            result = _search_org(text)
+            assert (result and result.span()) == (expected and expected.span())
+
 
 class TestAnswerExtraction:
     """Tests for answer extraction with mocked OpenAI."""
@@ -93,6 +124,28 @@ class TestAnswerExtraction:
         result = propose_answer_from_chunk("What is John's salary?", chunk)
         assert result is None
 
+    @patch("app.rag_answerer.llm_extract")
+    def test_propose_answers_for_chunks_keeps_order(self, mock_extract):
+        """Concurrent LLM proposals should come back one per chunk, in order."""
+        def fake_extract(query, text):
+            if "weather" in text:
+                return {"answer": "NONE", "confidence": 0.0}
+            return {"answer": text.split()[0], "confidence": 0.8}
+
+        mock_extract.side_effect = fake_extract
+        chunks = [
+            {"text": f"Answer{i} appears in this chunk text.", "filename": f"{i}.txt"}
+            for i in range(5)
+        ]
+        chunks.insert(2, {"text": "The weather is nice today.", "filename": "w.txt"})
+
+        results = propose_answers_for_chunks("Which answer?", chunks, use_llm=True)
+
+        assert len(results) == 6
+        assert results[2] is None
+        answers = [r.answer for r in results if r]
+        assert answers == [f"Answer{i}" for i in range(5)]
+
     @patch("app.rag_answerer.llm_available")
     def test_propose_answer_fallback(self, mock_available):
         """Should use regex fallback when LLM unavailable."""
@@ -64,6 +64,17 @@ class TestScannerConfig:
         assert not config.is_directory_excluded(Path("/home/user/Documents"))
         assert not config.is_directory_excluded(Path("/Users/me/Desktop"))
 
+    def test_compile_exclusions_after_change(self):
+        """Recompiling should pick up edited exclusion lists."""
+        config = ScannerConfig(excluded_directories=["**/private"])
+        assert not config.is_directory_excluded(Path("/home/user/drafts"))
+        
+        config.excluded_directories.append("**/drafts")
+        config.compile_exclusions()
+        
+        assert config.is_directory_excluded(Path("/home/user/drafts/2024"))
+        assert config.is_directory_excluded(Path("/home/user/private"))
+
     def test_is_file_excluded_env(self):
         """Env files should be excluded."""
         config = ScannerConfig()
@@ -95,6 +106,16 @@ class TestScannerConfig:
         assert config.is_file_excluded(Path("/app/toolbarButton-save.png"))
         assert config.is_file_excluded(Path("/app/logo.png"))
 
+    def test_substring_patterns_without_automaton(self):
+        """Substring patterns should match the same with or without pyahocorasick."""
+        paths = [Path("/app/icon.png"), Path("/tokens/report.pdf"), Path("/docs/report.pdf")]
+        expected = [ScannerConfig().is_file_excluded(p) for p in paths]
+
+        with patch("app.scanner_config.AHOCORASICK_AVAILABLE", False):
+            config = ScannerConfig()
+
+        assert [config.is_file_excluded(p) for p in paths] == expected == [True, True, False]
+
     def test_is_file_excluded_allowed(self):
         """Regular files should not be excluded."""
         config = ScannerConfig()
@@ -120,6 +141,20 @@ class TestScannerConfig:
         assert not config.is_file_size_valid(small_file)
         assert config.is_file_size_valid(valid_file)
 
+    def test_probe_reused_by_size_check(self, temp_dir):
+        """A probe should carry stat data so checks don't stat again."""
+        config = ScannerConfig(min_file_size_bytes=100)
+        
+        path = temp_dir / "doc.txt"
+        path.write_text("x" * 500)
+        probe = config.probe(path)
+        
+        assert probe.size == 500
+        path.unlink()
+        # The size check uses the probe, not a fresh stat
+        assert config.is_file_size_valid(probe)
+        assert config.probe(path) is None
+
     def test_should_process_image_disabled(self):
         """Images should not be processed when disabled."""
         config = ScannerConfig(process_images=False)
@@ -132,6 +167,40 @@ class TestScannerConfig:
         
         assert not config.should_process_image(Path("/photos/test.jpg"))
 
+    def test_is_image_large_enough_reads_header(self, temp_dir):
+        """PNG and GIF dimensions should come from the header bytes."""
+        config = ScannerConfig(min_image_width=200, min_image_height=200)
+        
+        def png(width, height):
+            return (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+                    + width.to_bytes(4, "big") + height.to_bytes(4, "big") + b"\x08\x02\x00\x00\x00")
+        
+        (temp_dir / "photo.png").write_bytes(png(800, 600))
+        (temp_dir / "icon.png").write_bytes(png(32, 32))
+        (temp_dir / "banner.gif").write_bytes(b"GIF89a" + (640).to_bytes(2, "little") + (100).to_bytes(2, "little"))
+        
+        with patch("app.scanner_config._pil_image") as mock_pil:
+            assert config.is_image_large_enough(temp_dir / "photo.png")
+            assert not config.is_image_large_enough(temp_dir / "icon.png")
+            assert not config.is_image_large_enough(temp_dir / "banner.gif")
+            mock_pil.assert_not_called()
+
+    def test_should_process_image_in_image_directories(self, temp_dir):
+        """Only images under image_scan_directories should be processed, however spelled."""
+        photos = temp_dir / "photos"
+        photos.mkdir()
+        (temp_dir / "photos-link").symlink_to(photos)
+        header = (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+                  + (800).to_bytes(4, "big") + (600).to_bytes(4, "big"))
+        (photos / "a.png").write_bytes(header)
+        (temp_dir / "b.png").write_bytes(header)
+        
+        config = ScannerConfig(process_images=True, image_scan_directories=[photos])
+        
+        assert config.should_process_image(photos / "a.png")
+        assert config.should_process_image(temp_dir / "photos-link" / "a.png")
+        assert not config.should_process_image(temp_dir / "b.png")
+
     def test_get_scan_directories_filters_nonexistent(self, temp_dir):
         """Should filter out nonexistent directories."""
         existing_dir = temp_dir / "exists"
@@ -203,6 +272,21 @@ parallel_workers: 8
         assert config.parallel_workers == 8
         assert len(config.scan_directories) == 2
 
+    def test_load_config_uses_fresh_cache(self, temp_dir):
+        """Parsed YAML should be cached and refreshed when the file changes."""
+        config_path = temp_dir / "config.yaml"
+        config_path.write_text("parallel_workers: 8\n")
+        
+        assert load_config(config_path).parallel_workers == 8
+        assert (temp_dir / "config.yaml.cache.json").exists()
+        
+        with patch("app.scanner_config.yaml.load") as mock_load:
+            assert load_config(config_path).parallel_workers == 8
+            mock_load.assert_not_called()
+        
+        config_path.write_text("parallel_workers: 16\n")
+        assert load_config(config_path).parallel_workers == 16
+
     def test_load_invalid_yaml(self, temp_dir):
         """Invalid YAML should use defaults."""
         config_path = temp_dir / "invalid.yaml"
@@ -0,0 +1,190 @@
+"""
+Tests for the search service (embedder and answer extraction stubbed).
+"""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.search_service import SearchService
+from app.vector_store import FAISSVectorStore
+
+
+DIM = 16
+
+DOCS = [
+    ("John Smith's salary is $150,000 per year at Acme Corp.", "salary.txt"),
+    ("The project deadline is March 31, 2024. The budget is $500,000.", "project.md"),
+    ("Acme Corp was founded in 2010 and is headquartered in San Francisco.", "company.txt"),
+    ("Meeting notes: discuss the roadmap and hiring plan for next quarter.", "notes.txt"),
+]
+
+QUERIES = [
+    "What is John's salary?",
+    "When is the project deadline?",
+    "Where is Acme headquartered?",
+]
+
+
+class StubEmbedder:
+    """Deterministic bag-of-words embeddings that records every embed() call."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), DIM), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, sum(word.encode()) % DIM] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+def stub_extract(query, chunks):
+    """Answer with the first chunk's opening words."""
+    top = chunks[0]
+    return {
+        "answerable": True,
+        "answer": " ".join(top["text"].split()[:4]),
+        "confidence": 0.9,
+        "source": top["filename"],
+        "filepath": top["filepath"],
+    }
+
+
+@pytest.fixture
+def make_service(temp_dir):
+    """Factory for SearchServices over a small FAISS index saved in temp_dir."""
+    embedder = StubEmbedder()
+    store = FAISSVectorStore(DIM)
+    store.add(
+        embedder.embed([text for text, _ in DOCS]),
+        [{"text": text, "filename": name, "filepath": f"/docs/{name}"} for text, name in DOCS],
+    )
+    store.save(temp_dir / "index")
+
+    with patch("app.search_service.extract_best_answer", side_effect=stub_extract) as mock_extract, \
+            patch("app.search_service.DOCUMENT_UTILS_AVAILABLE", False):
+        def factory():
+            with patch("app.search_service.EmbeddingGenerator", StubEmbedder):
+                service = SearchService(temp_dir / "index", temp_dir / f"research{factory.count}")
+            factory.count += 1
+            return service
+
+        factory.count = 0
+        factory.extract = mock_extract
+        yield factory
+
+
+class TestAnswerCache:
+    """Tests for cached answer() responses."""
+
+    def test_repeat_query_served_from_cache(self, make_service):
+        """Case and spacing variants of a query should reuse the cached answer."""
+        service = make_service()
+
+        first = service.answer("What is John's salary?")
+        second = service.answer("  what is JOHN'S   salary? ")
+
+        assert second == first
+        assert make_service.extract.call_count == 1
+
+    def test_cached_answer_is_isolated_copy(self, make_service):
+        """Mutating a returned response should not change later cache hits."""
+        service = make_service()
+
+        first = service.answer("What is John's salary?")
+        first["answer"] = "edited"
+        first["documents"].clear()
+
+        second = service.answer("What is John's salary?")
+        assert second["answer"] != "edited"
+        assert second["documents"]
+
+    def test_index_change_invalidates_cache(self, make_service):
+        """Adding vectors to the index should force a fresh answer."""
+        service = make_service()
+        service.answer("What is John's salary?")
+
+        text = "John Smith got a raise to $160,000 this year."
+        service.store.add(
+            service.embedder.embed([text]),
+            [{"text": text, "filename": "raise.txt", "filepath": "/docs/raise.txt"}],
+        )
+        service.answer("What is John's salary?")
+
+        assert make_service.extract.call_count == 2
+
+    def test_streaming_replays_cached_answer(self, make_service):
+        """A cached answer should stream the same pieces and final payload."""
+        service = make_service()
+        runs = []
+        for _ in range(2):
+            tokens, completed = [], []
+            result = service.answer_streaming(
+                "What is John's salary?",
+                on_answer_token=tokens.append,
+                on_complete=completed.append,
+            )
+            runs.append((tokens, completed, result))
+
+        (tokens, completed, result), (cached_tokens, cached_completed, cached_result) = runs
+        assert "".join(tokens) == result["answer"]
+        assert cached_tokens == tokens
+        assert cached_completed == completed == [result]
+        assert cached_result == result
+        assert make_service.extract.call_count == 1
+
+    def test_streaming_rejects_unknown_granularity(self, make_service):
+        """Only word and char streaming are supported."""
+        service = make_service()
+
+        with pytest.raises(ValueError):
+            service.answer_streaming("What is John's salary?", stream_granularity="line")
+
+
+class TestBatchAnswer:
+    """Tests for batch_answer()."""
+
+    def test_matches_individual_answers(self, make_service):
+        """Batch responses should equal answering each query on its own."""
+        single = make_service()
+        expected = [single.answer(q) for q in QUERIES]
+
+        assert make_service().batch_answer(QUERIES) == expected
+
+    def test_one_embed_call_for_misses_and_one_save(self, make_service):
+        """Uncached queries should share one embed call and one research save."""
+        service = make_service()
+        service.answer(QUERIES[0])
+        service.embedder.calls.clear()
+
+        with patch.object(service.research, "save") as mock_save:
+            service.batch_answer(QUERIES)
+
+        query_calls = [call for call in service.embedder.calls if call[0] in QUERIES]
+        assert query_calls == [QUERIES[1:]]
+        research_calls = [call for call in service.embedder.calls if call[0].startswith("Query:")]
+        assert len(research_calls) == 1
+        mock_save.assert_called_once()
+
+
+class TestBuildDocumentList:
+    """Tests for the per-file document list."""
+
+    def test_file_ranked_by_best_chunk(self, make_service):
+        """A file whose later chunk outscores its first should be ranked by that chunk."""
+        service = make_service()
+        results = [
+            {"filepath": "/docs/b.txt", "filename": "b.txt", "text": "only chunk of b", "final_score": 0.7},
+            {"filepath": "/docs/a.txt", "filename": "a.txt", "text": "first chunk of a", "final_score": 0.5},
+            {"filepath": "/docs/a.txt", "filename": "a.txt", "text": "second chunk of a", "final_score": 0.9},
+        ]
+
+        documents = service._build_document_list(results, limit=5)
+
+        assert [d["filename"] for d in documents] == ["a.txt", "b.txt"]
+        assert documents[0]["score"] == 0.9
+        assert documents[0]["preview"].startswith("second chunk")
@@ -102,6 +102,21 @@ class TestFAISSVectorStore:
         assert len(results_3) == 3
         assert len(results_5) == 5
 
+    def test_search_batch_matches_single_search(self):
+        """Batched search should return one result list per query row."""
+        store = FAISSVectorStore(dim=384)
+        
+        embeddings = np.random.rand(6, 384).astype("float32")
+        metadata = [{"text": f"doc{i}"} for i in range(6)]
+        store.add(embeddings, metadata)
+        
+        queries = np.random.rand(3, 384).astype("float32")
+        batched = store.search_batch(queries, k=4)
+        
+        assert len(batched) == 3
+        for row, results in enumerate(batched):
+            assert results == store.search(queries[row:row + 1], k=4)
+
     def test_save_and_load(self, temp_dir):
         """Store should save and load correctly."""
         store = FAISSVectorStore(dim=384)
@@ -286,9 +286,9 @@ class ModernSynapseUI:
                     text="🔍" if "Search" in status else "✨"
                 ))
             
-            def on_answer_token(char):
-                """Called for each character - typewriter effect."""
-                self.root.after(0, lambda c=char: self._append_answer_char(c))
+            def on_answer_token(token):
+                """Called for each word of the answer - typewriter effect."""
+                self.root.after(0, lambda t=token: self._append_answer_char(t))
             
             def on_complete(result):
                 """Called when search completes."""
@@ -329,7 +329,7 @@ class ModernSynapseUI:
             self.source_label.configure(text="Finding answer...")
     
     def _append_answer_char(self, char: str) -> None:
-        """Append a character to the streaming answer display."""
+        """Append a piece of text to the streaming answer display."""
         current = self.answer_label.cget("text")
         self.answer_label.configure(text=current + char)
 